@@ -0,0 +1,102 @@
+import argparse
+import gc
+import random
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from models.product import ProductDetail
+from repository.catalog_store import CompactCatalog
+
+
+BRANDS = ["Samsung", "Apple", "Google", "Xiaomi", "Motorola", "Lenovo", "Dell", "HP", "Asus", "Sony"]
+CATEGORIES = ["Smartphones", "Laptops", "Tablets", "Desktops", "Accessories"]
+
+
+def synthetic_documents(count: int, seed: int = 42):
+    """
+    Genera documentos parecidos a los de ejemplo (5 specs, descripción de ~70 caracteres).
+    """
+    rng = random.Random(seed)
+    for index in range(count):
+        brand = rng.choice(BRANDS)
+        yield {
+            "_id": ObjectId(),
+            "name": f"{brand} Modelo {index}",
+            "brand": brand,
+            "price": round(rng.uniform(50, 3000), 2),
+            "image_url": f"https://example.com/products/{index}.jpg",
+            "description": f"Producto {index} de {brand} con pantalla de {rng.choice([6.1, 6.7, 13.6, 15.6])} pulgadas y envío rápido",
+            "category": rng.choice(CATEGORIES),
+            "rating": round(rng.uniform(1, 5), 1),
+            "specs": {
+                "screen_size": f"{rng.choice([6.1, 6.7, 13.6, 15.6])} inches",
+                "storage": f"{rng.choice([64, 128, 256, 512])}GB",
+                "ram": f"{rng.choice([4, 8, 16, 32])}GB",
+                "camera": f"{rng.choice([12, 48, 50, 108])}MP",
+                "battery": f"{rng.randint(3000, 6000)}mAh"
+            },
+            "version": 1
+        }
+
+
+def measure(build):
+    """
+    Returns:
+        tuple: (objeto construido, bytes retenidos según tracemalloc, segundos)
+    """
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def build_pydantic(count: int):
+    products = []
+    for document in synthetic_documents(count):
+        document["id"] = str(document.pop("_id"))
+        products.append(ProductDetail(**document))
+    return products
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compara la memoria de List[ProductDetail] contra CompactCatalog.")
+    parser.add_argument("--products", type=int, default=1_000_000, help="Productos del catálogo compacto")
+    parser.add_argument("--baseline-products", type=int, default=100_000,
+                        help="Productos de la línea base Pydantic (se extrapola linealmente a --products)")
+    args = parser.parse_args(argv)
+
+    baseline, baseline_bytes, baseline_seconds = measure(lambda: build_pydantic(args.baseline_products))
+    per_product_baseline = baseline_bytes / args.baseline_products
+    del baseline
+
+    catalog, compact_bytes, compact_seconds = measure(lambda: CompactCatalog.from_documents(synthetic_documents(args.products)))
+    per_product_compact = compact_bytes / args.products
+
+    sample = random.Random(1).sample(range(len(catalog)), 1000)
+    started = time.perf_counter()
+    for row in sample:
+        catalog.materialize(row)
+    materialize_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    print(f"List[ProductDetail]: {per_product_baseline:,.0f} B/producto "
+          f"(medido con {args.baseline_products:,}, construido en {baseline_seconds:.1f} s)")
+    print(f"CompactCatalog:      {per_product_compact:,.0f} B/producto "
+          f"(medido con {args.products:,}, construido en {compact_seconds:.1f} s, columnas {catalog.nbytes() / args.products:,.0f} B)")
+    print(f"Con {args.products:,} productos: {per_product_baseline * args.products / 2**20:,.0f} MiB "
+          f"vs {compact_bytes / 2**20:,.0f} MiB ({per_product_baseline / per_product_compact:.1f}x menos)")
+    print(f"Materializar un ProductDetail: {materialize_us:.1f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
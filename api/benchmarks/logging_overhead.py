@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from loguru import logger
+
+from config.logging_config import configure_logging
+from middleware.access_log import install_access_log
+
+
+def build_app(access_log) -> FastAPI:
+    """
+    Aplicación mínima con un endpoint trivial, para que el costo medido sea el del logging.
+    """
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    if access_log is not None:
+        access_log(app)
+    return app
+
+
+class BeforeAccessLog:
+    """
+    Configuración anterior: una línea de acceso en texto por petición, formateada
+    y escrita en el event loop (como el access log de uvicorn) en un sink síncrono.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_with_status)
+        host, port = scope["client"]
+        logger.info(f'{host}:{port} - "{scope["method"]} {scope["path"]} HTTP/{scope["http_version"]}" {status_code}')
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    """
+    Llama a la aplicación ASGI directamente (sin red) y devuelve µs por petición.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80)
+    }
+
+    async def request():
+        # Como un servidor real: el cuerpo se entrega una vez y la desconexión llega al terminar la respuesta
+        finished = asyncio.Event()
+        received = False
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished.set()
+
+        await app(dict(scope), receive, send)
+
+    for _ in range(min(requests, 500)):
+        await request()
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await request()
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def run_scenario(requests: int, configure, access_log) -> float:
+    logger.remove()
+    configure()
+    elapsed_us = asyncio.run(drive(build_app(access_log), requests))
+    logger.complete()
+    logger.remove()
+    return elapsed_us
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mide el costo del logging por petición antes y después del pipeline asíncrono.")
+    parser.add_argument("--requests", type=int, default=5_000, help="Peticiones por escenario y ronda")
+    parser.add_argument("--rounds", type=int, default=5, help="Rondas intercaladas; se reporta la mejor de cada escenario")
+    parser.add_argument("--sample-rate", type=float, default=0.01, help="Fracción de peticiones exitosas registradas")
+    parser.add_argument("--log-dir", help="Directorio de los logs (por defecto uno temporal; use un disco lento para ver el efecto de enqueue)")
+    args = parser.parse_args(argv)
+
+    log_dir = args.log_dir or tempfile.mkdtemp(prefix="logging-bench-")
+
+    scenarios = [
+        ("sin logging", lambda: None, None),
+        ("antes: sink síncrono + log de cada petición",
+         lambda: logger.add(os.path.join(log_dir, "before.log"), rotation="500 MB", level="INFO"),
+         lambda app: app.add_middleware(BeforeAccessLog)),
+        ("después: enqueue + JSON, todo registrado",
+         lambda: configure_logging(os.path.join(log_dir, "after-full.log"), level="INFO"),
+         lambda app: install_access_log(app, sample_rate=1.0)),
+        (f"después: enqueue + JSON, muestreo {args.sample_rate:g}",
+         lambda: configure_logging(os.path.join(log_dir, "after.log"), level="INFO"),
+         lambda app: install_access_log(app, sample_rate=args.sample_rate))
+    ]
+
+    # La consola de configure_logging se redirige para no mezclar la salida del benchmark
+    stderr = sys.stderr
+    sys.stderr = open(os.devnull, "w")
+    timings = {name: [] for name, _, _ in scenarios}
+    try:
+        # Los escenarios se intercalan para que la deriva de la máquina no favorezca a ninguno
+        for _ in range(args.rounds):
+            for name, configure, access_log in scenarios:
+                timings[name].append(run_scenario(args.requests, configure, access_log))
+    finally:
+        sys.stderr.close()
+        sys.stderr = stderr
+
+    baseline = min(timings[scenarios[0][0]])
+    for name, _, _ in scenarios:
+        elapsed_us = min(timings[name])
+        print(f"{name:<48} {elapsed_us:8.1f} µs/petición  (+{elapsed_us - baseline:6.1f} µs de logging)")
+    print(f"Logs escritos en {log_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
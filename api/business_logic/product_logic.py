@@ -1,6 +1,30 @@
 from typing import List, Optional, Dict
-from models.product import ProductDetail, ProductCompareRequest, ProductCompareResponse
-from repository.product_repository import get_products, get_product_by_id, create_product, create_product
+from config.core import settings
+from models.product import ProductDetail, ProductCompareRequest, ProductCompareResponse, CategoryStats
+from repository.product_repository import (
+    get_products,
+    get_product_by_id,
+    get_products_by_ids,
+    get_product_feature_sources,
+    get_top_products,
+    create_product,
+    update_product,
+    delete_product,
+    bulk_update_prices,
+    on_catalog_swapped
+)
+from repository.category_stats_repository import get_category_stats
+from business_logic.similarity import ProductFeatureIndex
+from middleware.response_cache import response_cache
+
+
+feature_index = ProductFeatureIndex(refresh_seconds=settings.SIMILAR_INDEX_REFRESH_SECONDS)
+
+# Familias de respuestas cacheadas que dependen de cualquier producto
+_CATALOG_WIDE_FAMILIES = ("list", "similar", "other")
+
+# Una versión nueva del snapshot compartido puede traer escrituras de otros workers
+on_catalog_swapped(lambda: response_cache.invalidate(*_CATALOG_WIDE_FAMILIES, "category:*", "product:*"))
 
 
 def list_products() -> List[ProductDetail]:
@@ -140,6 +164,175 @@ def create_product_logic(product_request: dict) -> ProductDetail:
     
     try:
         created_product = create_product(product_request)
+        feature_index.upsert(created_product.dict())
+        response_cache.invalidate(*_CATALOG_WIDE_FAMILIES, f"category:{created_product.category.lower()}")
         return created_product
     except Exception as e:
-        raise Exception(f"Error al crear producto: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error al crear producto: {str(e)}")
+
+
+def update_product_logic(product_id: str, update_data: dict) -> Optional[ProductDetail]:
+    """
+    Actualiza parcialmente un producto existente.
+    
+    Args:
+        product_id: ID del producto
+        update_data: Campos a modificar
+        
+    Returns:
+        Optional[ProductDetail]: Producto actualizado o None si no existe
+    """
+    if not product_id:
+        raise ValueError("ID de producto requerido")
+    
+    if not update_data:
+        raise ValueError("Se requiere al menos un campo para actualizar")
+    
+    if "price" in update_data and update_data["price"] <= 0:
+        raise ValueError("El precio debe ser mayor a 0")
+    
+    try:
+        updated_product = update_product(product_id, update_data)
+        if updated_product:
+            feature_index.upsert(updated_product.dict())
+            # La categoría anterior no se conoce aquí: se invalidan todas
+            response_cache.invalidate(*_CATALOG_WIDE_FAMILIES, "category:*", f"product:{product_id}")
+        return updated_product
+    except Exception as e:
+        raise Exception(f"Error al actualizar producto {product_id}: {str(e)}")
+
+
+def delete_product_logic(product_id: str) -> bool:
+    """
+    Elimina un producto existente.
+    
+    Args:
+        product_id: ID del producto
+        
+    Returns:
+        bool: True si el producto fue eliminado, False si no existe
+    """
+    if not product_id:
+        raise ValueError("ID de producto requerido")
+    
+    try:
+        deleted = delete_product(product_id)
+        if deleted:
+            feature_index.remove(product_id)
+            response_cache.invalidate(*_CATALOG_WIDE_FAMILIES, "category:*", f"product:{product_id}")
+        return deleted
+    except Exception as e:
+        raise Exception(f"Error al eliminar producto {product_id}: {str(e)}")
+
+
+def bulk_update_prices_logic(price_updates: List[dict]) -> dict:
+    """
+    Actualiza el precio de múltiples productos en una sola operación.
+    
+    Args:
+        price_updates: Lista de diccionarios con "id" y "price"
+        
+    Returns:
+        dict: Resultado de la actualización masiva
+    """
+    if not price_updates:
+        raise ValueError("Se requiere al menos un cambio de precio")
+    
+    if any(item.get("price") is None or item["price"] <= 0 for item in price_updates):
+        raise ValueError("El precio debe ser mayor a 0")
+    
+    try:
+        result = bulk_update_prices(price_updates)
+        for item in price_updates:
+            feature_index.update_price(item["id"], item["price"])
+        if result["modified_count"]:
+            response_cache.invalidate(*_CATALOG_WIDE_FAMILIES, "category:*", "product:*")
+        result["message"] = f"Actualización de precios completada: {result['modified_count']} productos modificados"
+        return result
+    except Exception as e:
+        raise Exception(f"Error al actualizar precios: {str(e)}")
+
+
+def get_similar_products(product_id: str, k: int = 5) -> Optional[List[ProductDetail]]:
+    """
+    Sugiere productos similares de la misma categoría para comparar.
+    
+    Args:
+        product_id: ID del producto de referencia
+        k: Número máximo de productos a sugerir
+        
+    Returns:
+        Optional[List[ProductDetail]]: Productos del más al menos similar, o None si el producto no existe
+    """
+    if not product_id:
+        raise ValueError("ID de producto requerido")
+    
+    if k < 1 or k > 50:
+        raise ValueError("k debe estar entre 1 y 50")
+    
+    try:
+        feature_index.ensure_loaded(get_product_feature_sources)
+        
+        index = feature_index
+        if not index.loaded or product_id not in index:
+            product = get_product_by_id(product_id)
+            if not product:
+                return None
+            if index.loaded:
+                index.upsert(product.dict())
+            else:
+                # El índice completo se construye en segundo plano: mientras tanto solo se indexa la categoría
+                index = ProductFeatureIndex()
+                index.rebuild(get_product_feature_sources(product.category))
+                index.upsert(product.dict())
+        
+        neighbours = index.nearest(product_id, k)
+        return get_products_by_ids([neighbour_id for neighbour_id, _ in neighbours])
+    except Exception as e:
+        raise Exception(f"Error al obtener productos similares a {product_id}: {str(e)}")
+
+
+def get_category_stats_logic(category: str) -> Optional[CategoryStats]:
+    """
+    Obtiene el resumen materializado de una categoría.
+    
+    Args:
+        category: Nombre de la categoría
+        
+    Returns:
+        Optional[CategoryStats]: Estadísticas de la categoría o None si no tiene productos
+    """
+    if not category or not category.strip():
+        raise ValueError("Categoría requerida")
+    
+    try:
+        return get_category_stats(category.strip())
+    except Exception as e:
+        raise Exception(f"Error al obtener estadísticas de la categoría {category}: {str(e)}")
+
+
+def get_top_products_logic(category: str, by: str = "rating", k: int = 10) -> List[ProductDetail]:
+    """
+    Obtiene el ranking de una categoría: los productos mejor calificados o los más baratos.
+    
+    Args:
+        category: Nombre de la categoría
+        by: "rating" (mejor calificados primero) o "price" (más baratos primero)
+        k: Número de productos a devolver
+        
+    Returns:
+        List[ProductDetail]: Productos en orden de ranking
+    """
+    if not category or not category.strip():
+        raise ValueError("Categoría requerida")
+    
+    if by not in ("rating", "price"):
+        raise ValueError("by debe ser 'rating' o 'price'")
+    
+    if k < 1 or k > 50:
+        raise ValueError("k debe estar entre 1 y 50")
+    
+    try:
+        return get_top_products(category.strip(), by, k)
+    except Exception as e:
+        raise Exception(f"Error al obtener el ranking de la categoría {category}: {str(e)}")
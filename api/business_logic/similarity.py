@@ -0,0 +1,374 @@
+import math
+import re
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+BRAND_DIMENSIONS = 8
+SPEC_DIMENSIONS = 16
+FEATURE_DIMENSIONS = 2 + BRAND_DIMENSIONS + SPEC_DIMENSIONS
+
+_PRICE_COLUMN = 0
+_RATING_COLUMN = 1
+_BRAND_OFFSET = 2
+_SPEC_OFFSET = _BRAND_OFFSET + BRAND_DIMENSIONS
+
+_NUMBER_PATTERN = re.compile(r"[-+]?\d+(?:[.,]\d+)?")
+
+
+def _bucket(value: str, dimensions: int) -> int:
+    """
+    Asigna un texto a una posición fija del vector (hashing trick estable entre procesos).
+    """
+    return zlib.crc32(value.strip().lower().encode("utf-8")) % dimensions
+
+
+def parse_spec_number(value: str) -> Optional[float]:
+    """
+    Extrae el primer valor numérico de una especificación ("128GB" -> 128.0).
+
+    Args:
+        value: Valor de la especificación
+
+    Returns:
+        Optional[float]: Número encontrado o None si no contiene números
+    """
+    match = _NUMBER_PATTERN.search(str(value))
+    if not match:
+        return None
+    return float(match.group(0).replace(",", "."))
+
+
+def encode_features(product: dict) -> np.ndarray:
+    """
+    Codifica un producto como vector de características.
+
+    El precio y las especificaciones numéricas se escalan con log1p para que
+    magnitudes distintas (GB, MP, mAh) sean comparables; la marca y las claves
+    de especificaciones se proyectan a posiciones fijas por hashing. La categoría
+    no forma parte del vector porque el índice se particiona por categoría.
+
+    Args:
+        product: Diccionario con los campos del producto
+
+    Returns:
+        np.ndarray: Vector float32 de FEATURE_DIMENSIONS posiciones
+    """
+    vector = np.zeros(FEATURE_DIMENSIONS, dtype=np.float32)
+
+    vector[_PRICE_COLUMN] = math.log1p(max(float(product.get("price") or 0), 0.0))
+    rating = product.get("rating")
+    vector[_RATING_COLUMN] = (rating if rating is not None else 2.5) / 5.0
+
+    if product.get("brand"):
+        vector[_BRAND_OFFSET + _bucket(product["brand"], BRAND_DIMENSIONS)] = 1.0
+
+    for key, value in (product.get("specs") or {}).items():
+        number = parse_spec_number(value)
+        if number is None or number < 0:
+            continue
+        vector[_SPEC_OFFSET + _bucket(key, SPEC_DIMENSIONS)] += math.log1p(number)
+
+    return vector
+
+
+def encode_feature_matrix(products: Iterable[dict]) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    Codifica muchos productos a la vez, con el mismo resultado que `encode_features`.
+
+    Solo la lectura de los documentos queda en Python; los buckets y los números
+    de especificaciones se memorizan (se repiten mucho) y el llenado de la matriz
+    se hace con operaciones vectorizadas.
+
+    Args:
+        products: Productos (dict con "id")
+
+    Returns:
+        Tuple[List[str], List[str], np.ndarray]: IDs, categorías en minúsculas y matriz float32
+    """
+    ids, categories, prices, ratings = [], [], [], []
+    brand_rows, brand_columns = [], []
+    spec_rows, spec_columns, spec_values = [], [], []
+    brand_buckets: Dict[str, int] = {}
+    spec_buckets: Dict[str, int] = {}
+    numbers: Dict[str, Optional[float]] = {}
+
+    for row, product in enumerate(products):
+        ids.append(product["id"])
+        categories.append((product.get("category") or "").lower())
+        prices.append(float(product.get("price") or 0))
+        rating = product.get("rating")
+        ratings.append(rating if rating is not None else 2.5)
+
+        brand = product.get("brand")
+        if brand:
+            column = brand_buckets.get(brand)
+            if column is None:
+                column = brand_buckets[brand] = _bucket(brand, BRAND_DIMENSIONS)
+            brand_rows.append(row)
+            brand_columns.append(column)
+
+        for key, value in (product.get("specs") or {}).items():
+            text = str(value)
+            if text not in numbers:
+                numbers[text] = parse_spec_number(text)
+            number = numbers[text]
+            if number is None or number < 0:
+                continue
+            column = spec_buckets.get(key)
+            if column is None:
+                column = spec_buckets[key] = _bucket(key, SPEC_DIMENSIONS)
+            spec_rows.append(row)
+            spec_columns.append(column)
+            spec_values.append(number)
+
+    matrix = np.zeros((len(ids), FEATURE_DIMENSIONS), dtype=np.float32)
+    matrix[:, _PRICE_COLUMN] = np.log1p(np.maximum(np.array(prices, dtype=np.float64), 0.0))
+    matrix[:, _RATING_COLUMN] = np.array(ratings, dtype=np.float64) / 5.0
+    matrix[brand_rows, _BRAND_OFFSET + np.array(brand_columns, dtype=np.int64)] = 1.0
+    np.add.at(
+        matrix,
+        (np.array(spec_rows, dtype=np.int64), _SPEC_OFFSET + np.array(spec_columns, dtype=np.int64)),
+        np.log1p(np.array(spec_values, dtype=np.float64)).astype(np.float32)
+    )
+    return ids, categories, matrix
+
+
+class _CategoryMatrix:
+    """Matriz de vectores de una categoría con crecimiento amortizado."""
+
+    def __init__(self):
+        self.vectors = np.zeros((16, FEATURE_DIMENSIONS), dtype=np.float32)
+        self.sq_norms = np.zeros(16, dtype=np.float32)
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_vectors(cls, ids: List[str], vectors: np.ndarray) -> "_CategoryMatrix":
+        matrix = cls.__new__(cls)
+        matrix.vectors = vectors
+        matrix.sq_norms = np.einsum("ij,ij->i", vectors, vectors)
+        matrix.ids = ids
+        matrix.rows = {product_id: row for row, product_id in enumerate(ids)}
+        return matrix
+
+    def upsert(self, product_id: str, vector: np.ndarray):
+        row = self.rows.get(product_id)
+        if row is None:
+            row = len(self.ids)
+            if row == self.vectors.shape[0]:
+                self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+                self.sq_norms = np.concatenate([self.sq_norms, np.zeros_like(self.sq_norms)])
+            self.ids.append(product_id)
+            self.rows[product_id] = row
+        self.vectors[row] = vector
+        self.sq_norms[row] = float(vector @ vector)
+
+    def remove(self, product_id: str):
+        row = self.rows.pop(product_id, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.vectors[row] = self.vectors[last]
+            self.sq_norms[row] = self.sq_norms[last]
+            self.ids[row] = moved_id
+            self.rows[moved_id] = row
+        self.ids.pop()
+
+    def nearest(self, product_id: str, k: int) -> List[Tuple[str, float]]:
+        size = len(self.ids)
+        row = self.rows[product_id]
+        if size <= 1:
+            return []
+
+        query = self.vectors[row]
+        # ||m - q||² = ||m||² - 2 m·q + ||q||²: un solo producto matriz-vector sobre la categoría
+        distances = self.sq_norms[:size] - 2.0 * (self.vectors[:size] @ query) + self.sq_norms[row]
+        distances[row] = np.inf
+
+        k = min(k, size - 1)
+        candidates = np.argpartition(distances, k - 1)[:k]
+        candidates = candidates[np.argsort(distances[candidates], kind="stable")]
+
+        return [(self.ids[i], float(max(distances[i], 0.0))) for i in candidates]
+
+
+def _build_partitions(products: Iterable[dict]) -> Tuple[Dict[str, _CategoryMatrix], Dict[str, str]]:
+    ids, categories, matrix = encode_feature_matrix(products)
+    rows_by_category: Dict[str, List[int]] = {}
+    for row, category in enumerate(categories):
+        rows_by_category.setdefault(category, []).append(row)
+
+    partitions = {
+        category: _CategoryMatrix.from_vectors([ids[row] for row in rows], matrix[rows])
+        for category, rows in rows_by_category.items()
+    }
+    return partitions, dict(zip(ids, categories))
+
+
+class ProductFeatureIndex:
+    """
+    Índice en memoria de vectores de características particionado por categoría.
+
+    Se construye con un recorrido de la colección codificado de forma vectorizada
+    y después se mantiene de forma incremental en cada escritura. Al superar
+    `refresh_seconds` (para incorporar escrituras de otros workers) se reconstruye
+    en un hilo auxiliar y se reemplaza de una vez; mientras tanto se sigue
+    consultando el índice anterior. Las escrituras hechas durante la
+    reconstrucción se reaplican sobre el índice nuevo.
+    """
+
+    def __init__(self, refresh_seconds: float = 300.0):
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at: Optional[float] = None
+        self._categories: Dict[str, _CategoryMatrix] = {}
+        self._product_category: Dict[str, str] = {}
+        self._pending: Optional[list] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._product_category
+
+    def __len__(self) -> int:
+        return len(self._product_category)
+
+    def ensure_loaded(self, loader: Callable[[], Iterable[dict]]):
+        """
+        Lanza la construcción del índice en un hilo auxiliar si no existe o si
+        expiró; no espera a que termine (ver `loaded`).
+
+        Args:
+            loader: Función que devuelve los productos (dict con "id") a indexar
+        """
+        if self.loaded and time.monotonic() - self.loaded_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if self._pending is not None:
+                return
+            self._pending = []
+
+        def run():
+            try:
+                self._swap(*_build_partitions(loader()))
+            except Exception as e:
+                logger.error(f"No se pudo construir el índice de productos similares: {str(e)}")
+                with self._lock:
+                    if self.loaded:
+                        # Se reintenta al cumplirse el siguiente intervalo, no en cada petición
+                        self.loaded_at = time.monotonic()
+            finally:
+                with self._lock:
+                    self._pending = None
+
+        threading.Thread(target=run, name="similar-index-refresh", daemon=True).start()
+
+    def rebuild(self, products: Iterable[dict]):
+        """
+        Reemplaza el contenido del índice con los productos dados.
+
+        Args:
+            products: Productos (dict con "id") a indexar
+        """
+        self._swap(*_build_partitions(products))
+
+    def _swap(self, categories: Dict[str, _CategoryMatrix], product_category: Dict[str, str]):
+        with self._lock:
+            self._categories = categories
+            self._product_category = product_category
+            for operation, args in self._pending or ():
+                getattr(self, operation)(*args)
+            self.loaded_at = time.monotonic()
+
+    def _record(self, operation: str, *args):
+        if self._pending is not None:
+            self._pending.append((operation, args))
+
+    def upsert(self, product: dict):
+        """
+        Inserta o actualiza el vector de un producto.
+
+        Args:
+            product: Diccionario con los campos del producto, incluido "id"
+        """
+        with self._lock:
+            self._upsert(product)
+            self._record("_upsert", dict(product))
+
+    def _upsert(self, product: dict):
+        product_id = product["id"]
+        category = (product.get("category") or "").lower()
+
+        previous = self._product_category.get(product_id)
+        if previous is not None and previous != category:
+            self._categories[previous].remove(product_id)
+
+        self._categories.setdefault(category, _CategoryMatrix()).upsert(product_id, encode_features(product))
+        self._product_category[product_id] = category
+
+    def update_price(self, product_id: str, price: float):
+        """
+        Actualiza solo la componente de precio de un producto indexado.
+
+        Args:
+            product_id: ID del producto
+            price: Nuevo precio
+        """
+        with self._lock:
+            self._update_price(product_id, price)
+            self._record("_update_price", product_id, price)
+
+    def _update_price(self, product_id: str, price: float):
+        category = self._product_category.get(product_id)
+        if category is None:
+            return
+        matrix = self._categories[category]
+        vector = matrix.vectors[matrix.rows[product_id]].copy()
+        vector[_PRICE_COLUMN] = math.log1p(max(price, 0.0))
+        matrix.upsert(product_id, vector)
+
+    def remove(self, product_id: str):
+        """
+        Elimina un producto del índice.
+
+        Args:
+            product_id: ID del producto
+        """
+        with self._lock:
+            self._remove(product_id)
+            self._record("_remove", product_id)
+
+    def _remove(self, product_id: str):
+        category = self._product_category.pop(product_id, None)
+        if category is not None:
+            self._categories[category].remove(product_id)
+
+    def nearest(self, product_id: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Busca los k productos más cercanos dentro de la misma categoría.
+
+        Args:
+            product_id: ID del producto de referencia
+            k: Número de vecinos a devolver
+
+        Returns:
+            List[Tuple[str, float]]: IDs y distancia cuadrática, del más cercano al más lejano
+        """
+        with self._lock:
+            category = self._product_category.get(product_id)
+            if category is None or k <= 0:
+                return []
+            return self._categories[category].nearest(product_id, k)
@@ -1,5 +1,6 @@
 import os
 import json
+import tempfile
 from types import SimpleNamespace
 from dotenv import load_dotenv
 
@@ -16,9 +17,34 @@ settings = {
     "MONGO_URI": mongo_uri,
     "MONGO_DB_NAME": mongo_db_name,
     "LOG_LEVEL": os.getenv("LOG_LEVEL", "INFO"),
+    "LOG_FILE": os.getenv("LOG_FILE", "app.log"),
+    "LOG_JSON": os.getenv("LOG_JSON", "True").lower() == "true",
+    "ACCESS_LOG_SAMPLE_RATE": float(os.getenv("ACCESS_LOG_SAMPLE_RATE", 0.01)),
+    "ACCESS_LOG_SLOW_MS": float(os.getenv("ACCESS_LOG_SLOW_MS", 500)),
     "HOST": os.getenv("HOST", "0.0.0.0"),
     "PORT": int(os.getenv("PORT", 8000)),
     "RELOAD": os.getenv("RELOAD", "True").lower() == "true",
+    "SIMILAR_INDEX_REFRESH_SECONDS": float(os.getenv("SIMILAR_INDEX_REFRESH_SECONDS", 300)),
+    "PROFILING_ENABLED": os.getenv("PROFILING_ENABLED", "False").lower() == "true",
+    "PROFILING_TOKEN": os.getenv("PROFILING_TOKEN"),
+    "PROFILING_SAMPLE_RATE": float(os.getenv("PROFILING_SAMPLE_RATE", 0)),
+    "PROFILING_DIR": os.getenv("PROFILING_DIR", "profiles"),
+    "PROFILING_INTERVAL_MS": float(os.getenv("PROFILING_INTERVAL_MS", 1)),
+    "PROFILING_MAX_FILES": int(os.getenv("PROFILING_MAX_FILES", 100)),
+    "SLOW_QUERY_MS": float(os.getenv("SLOW_QUERY_MS", 100)),
+    "SLOW_QUERY_EXPLAIN": os.getenv("SLOW_QUERY_EXPLAIN", "True").lower() == "true",
+    "SLOW_QUERY_BUFFER_SIZE": int(os.getenv("SLOW_QUERY_BUFFER_SIZE", 100)),
+    "ADMIN_TOKEN": os.getenv("ADMIN_TOKEN"),
+    "CATALOG_MEMORY_MODE": os.getenv("CATALOG_MEMORY_MODE", "False").lower() == "true",
+    "CATALOG_REFRESH_SECONDS": float(os.getenv("CATALOG_REFRESH_SECONDS", 60)),
+    "CATALOG_SHARED_SNAPSHOT": os.getenv("CATALOG_SHARED_SNAPSHOT", "False").lower() == "true",
+    "CATALOG_SNAPSHOT_PATH": os.getenv(
+        "CATALOG_SNAPSHOT_PATH",
+        os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "products-catalog.snap")
+    ),
+    "RESPONSE_CACHE_ENABLED": os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true",
+    "RESPONSE_CACHE_TTL_SECONDS": float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30)),
+    "RESPONSE_CACHE_MAX_MB": float(os.getenv("RESPONSE_CACHE_MAX_MB", 64)),
 }
 
 settings = SimpleNamespace(**settings)
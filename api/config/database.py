@@ -1,9 +1,54 @@
 import requests
+import threading
 import time
 from loguru import logger
 from opentelemetry import trace
 from pymongo import MongoClient
 from config.core import settings
+from config.query_monitor import SlowQueryListener
+
+
+_shared_client = None
+_explain_client = None
+_client_lock = threading.Lock()
+
+
+def _mongo_uri():
+    if not settings.MONGO_URI:
+        raise Exception("MONGO_URI environment variable is not set. Please configure it in your .env file.")
+    
+    uri = settings.MONGO_URI
+    if 'authSource' not in uri:
+        if '?' in uri:
+            uri += '&authSource=admin'
+        else:
+            uri += '?authSource=admin'
+    return uri
+
+
+def _run_explain(database_name, command):
+    """
+    Run an explain for a monitored command on a dedicated, unmonitored client.
+    
+    Args:
+        database_name: Database where the command ran
+        command: Command without driver fields
+        
+    Returns:
+        Explain result with executionStats verbosity
+    """
+    global _explain_client
+    with _client_lock:
+        if _explain_client is None:
+            _explain_client = MongoClient(_mongo_uri(), serverSelectionTimeoutMS=5000)
+    return _explain_client[database_name].command({"explain": command, "verbosity": "executionStats"})
+
+
+slow_query_listener = SlowQueryListener(
+    threshold_ms=settings.SLOW_QUERY_MS,
+    buffer_size=settings.SLOW_QUERY_BUFFER_SIZE,
+    explain_runner=_run_explain if settings.SLOW_QUERY_EXPLAIN else None
+)
 
 
 def get_mongo_client():
@@ -14,22 +59,34 @@ def get_mongo_client():
         MongoDB client
     """
     try:
-        if not settings.MONGO_URI:
-            raise Exception("MONGO_URI environment variable is not set. Please configure it in your .env file.")
-        
-        uri = settings.MONGO_URI
-        if 'authSource' not in uri:
-            if '?' in uri:
-                uri += '&authSource=admin'
-            else:
-                uri += '?authSource=admin'
-        
-        client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+        client = MongoClient(
+            _mongo_uri(),
+            serverSelectionTimeoutMS=5000,
+            event_listeners=[slow_query_listener]
+        )
         client.admin.command('ping')
         
         return client
     except Exception as e:
         raise Exception(f"Could not connect to MongoDB: {e}")
+
+
+def get_shared_client():
+    """
+    Get the process-wide MongoDB client, creating it on first use.
+    
+    The client keeps its own connection pool and is safe to share across
+    threads, so repositories should use it instead of opening a client per call.
+    
+    Returns:
+        MongoDB client
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _client_lock:
+            if _shared_client is None:
+                _shared_client = get_mongo_client()
+    return _shared_client
     
 
 def insert_document(collection_name, document):
@@ -119,7 +176,7 @@ def get_collection(collection_name: str):
         Colección de MongoDB
     """
     try:
-        client = get_mongo_client()
+        client = get_shared_client()
         db = client[settings.MONGO_DB_NAME]
         return db[collection_name]
     except Exception as e:
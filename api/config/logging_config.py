@@ -0,0 +1,38 @@
+import sys
+from contextvars import ContextVar
+
+from loguru import logger
+
+
+# Request id de la petición en curso; lo fija el middleware de log de acceso
+request_id_context: ContextVar[str] = ContextVar("request_id", default="-")
+
+CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "{extra[request_id]} | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+)
+
+
+def _add_request_id(record):
+    # Se resuelve solo cuando se emite un log, no en cada petición
+    record["extra"].setdefault("request_id", request_id_context.get())
+
+
+def configure_logging(path: str = "app.log", level: str = "INFO", serialize: bool = True):
+    """
+    Configura los sinks de loguru para que no bloqueen el event loop.
+
+    Ambos sinks usan `enqueue=True`: quien registra solo encola el mensaje y un
+    hilo auxiliar lo formatea y lo escribe. El archivo se escribe en JSON (un
+    objeto por línea con `extra.request_id` y los campos enlazados con
+    `logger.bind`) si `serialize` es True.
+
+    Args:
+        path: Archivo de log (rotación cada 500 MB)
+        level: Nivel mínimo
+        serialize: Si es True el archivo se escribe en JSON
+    """
+    logger.remove()
+    logger.configure(patcher=_add_request_id)
+    logger.add(sys.stderr, level=level, format=CONSOLE_FORMAT, enqueue=True)
+    logger.add(path, rotation="500 MB", level=level, enqueue=True, serialize=serialize)
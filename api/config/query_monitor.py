@@ -0,0 +1,212 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+from pymongo import monitoring
+
+
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Claves internas del driver que no describen la consulta
+_DRIVER_KEYS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "autocommit", "startTransaction", "apiVersion"}
+
+# Sus valores describen la forma de la consulta, no datos del usuario
+_SHAPE_KEYS = {"sort", "projection", "hint", "limit", "skip", "batchSize", "ordered", "upsert", "multi", "new"}
+
+# Listas cuyos elementos son partes distintas de la consulta y se redactan una por una
+_EXPANDED_LIST_KEYS = {"pipeline", "$and", "$or", "$nor"}
+
+
+def _is_stage_list(value) -> bool:
+    return bool(value) and all(
+        isinstance(item, dict) and item and all(str(k).startswith("$") for k in item) for item in value
+    )
+
+
+def redact_command(value, key: Optional[str] = None):
+    """
+    Reemplaza los valores de un comando por "?" conservando su estructura.
+
+    Se conservan el nombre de la colección (valor del nombre del comando) y cada
+    etapa de un pipeline o cláusula de $and/$or; las listas de valores (por
+    ejemplo de $in) se reducen a su primer elemento redactado.
+
+    Args:
+        value: Comando o fragmento de comando
+        key: Clave bajo la que aparece el valor
+
+    Returns:
+        Estructura equivalente sin valores de usuario
+    """
+    if key in _SHAPE_KEYS or (key in EXPLAINABLE_COMMANDS and isinstance(value, str)):
+        return value
+    if isinstance(value, dict):
+        return {k: redact_command(v, k) for k, v in value.items() if k not in _DRIVER_KEYS}
+    if isinstance(value, (list, tuple)):
+        if key in _EXPANDED_LIST_KEYS or _is_stage_list(value):
+            return [redact_command(item) for item in value]
+        return [redact_command(value[0])] if value else []
+    return "?"
+
+
+def summarize_explain(explain: dict) -> dict:
+    """
+    Resume un resultado de explain: etapas del plan ganador, índices usados y documentos examinados.
+
+    Args:
+        explain: Resultado del comando explain con verbosidad executionStats
+
+    Returns:
+        dict: Resumen con stages, indexes, collscan, docs_examined, keys_examined y n_returned
+    """
+    stages: List[str] = []
+    indexes: List[str] = []
+    stats: Dict[str, int] = {}
+
+    def walk(node, in_rejected=False):
+        if isinstance(node, dict):
+            if "stage" in node and not in_rejected:
+                stages.append(node["stage"])
+                if node.get("indexName"):
+                    indexes.append(node["indexName"])
+            if "totalDocsExamined" in node and not stats:
+                stats.update(
+                    docs_examined=node.get("totalDocsExamined", 0),
+                    keys_examined=node.get("totalKeysExamined", 0),
+                    n_returned=node.get("nReturned", 0)
+                )
+            for child_key, child in node.items():
+                if child_key in ("executionStages", "allPlansExecution"):
+                    continue
+                walk(child, in_rejected or child_key == "rejectedPlans")
+        elif isinstance(node, list):
+            for child in node:
+                walk(child, in_rejected)
+
+    walk(explain)
+
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collscan": "COLLSCAN" in stages,
+        **stats
+    }
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    Listener de comandos de pymongo que registra los comandos lentos.
+
+    Los comandos que superan `threshold_ms` se registran con su forma redactada
+    y duración, se guardan en un buffer circular y, si `explain_runner` está
+    definido, se les captura un explain en segundo plano para no sumar latencia
+    a la petición original. Como el explain vuelve a ejecutar la consulta, se
+    pide como máximo uno por forma de comando cada `explain_interval` segundos
+    y se descarta si ya hay `max_pending_explains` en cola.
+    """
+
+    def __init__(self, threshold_ms: float = 100.0, buffer_size: int = 100,
+                 explain_runner: Optional[Callable[[str, dict], dict]] = None,
+                 explain_interval: float = 300.0, max_pending_explains: int = 4):
+        self.threshold_ms = threshold_ms
+        self.explain_runner = explain_runner
+        self.explain_interval = explain_interval
+        self.max_pending_explains = max_pending_explains
+        self.recent = deque(maxlen=buffer_size)
+        self._inflight: Dict[int, dict] = {}
+        self._explained_at: Dict[str, float] = {}
+        self._pending_explains = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain") if explain_runner else None
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE_COMMANDS:
+            with self._lock:
+                self._inflight[event.request_id] = event.command
+
+    def succeeded(self, event):
+        self._finished(event, None)
+
+    def failed(self, event):
+        self._finished(event, str(event.failure.get("errmsg", event.failure)))
+
+    def _finished(self, event, error: Optional[str]):
+        with self._lock:
+            command = self._inflight.pop(event.request_id, None)
+
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "database": event.database_name,
+            "command_name": event.command_name,
+            "duration_ms": round(duration_ms, 2),
+            "command": redact_command(command) if command is not None else {event.command_name: "?"},
+            "error": error,
+            "explain": None
+        }
+        self.recent.append(entry)
+
+        if command is not None and self._executor is not None:
+            skipped = self._reserve_explain(entry["command"])
+            if skipped is None:
+                self._executor.submit(self._explain, event.database_name, command, entry)
+                return
+            entry["explain"] = {"skipped": skipped}
+        self._log(entry)
+
+    def _reserve_explain(self, redacted: dict) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: Motivo para no pedir el explain, o None si se reservó un lugar en la cola
+        """
+        shape = json.dumps(redacted, sort_keys=True, default=str)
+        now = time.monotonic()
+        with self._lock:
+            explained_at = self._explained_at.get(shape)
+            if explained_at is not None and now - explained_at < self.explain_interval:
+                return "forma ya explicada recientemente"
+            if self._pending_explains >= self.max_pending_explains:
+                return "cola de explain llena"
+            self._pending_explains += 1
+            self._explained_at[shape] = now
+            if len(self._explained_at) > 10 * self.recent.maxlen:
+                # Se olvidan las formas más antiguas para acotar la memoria
+                for old_shape in sorted(self._explained_at, key=self._explained_at.get)[:len(self._explained_at) // 2]:
+                    del self._explained_at[old_shape]
+            return None
+
+    def _explain(self, database_name: str, command: dict, entry: dict):
+        try:
+            explainable = {k: v for k, v in command.items() if k not in _DRIVER_KEYS}
+            # explain solo acepta una sentencia por comando update/delete
+            for statements in ("updates", "deletes"):
+                if explainable.get(statements):
+                    explainable[statements] = explainable[statements][:1]
+            entry["explain"] = summarize_explain(self.explain_runner(database_name, explainable))
+        except Exception as e:
+            entry["explain"] = {"error": str(e)}
+        finally:
+            with self._lock:
+                self._pending_explains -= 1
+        self._log(entry)
+
+    def _log(self, entry: dict):
+        logger.warning(
+            f"Consulta lenta: {entry['command_name']} {entry['duration_ms']} ms "
+            f"comando={entry['command']} explain={entry['explain']}"
+        )
+
+    def recent_queries(self) -> List[dict]:
+        """
+        Returns:
+            List[dict]: Consultas lentas recientes, de la más nueva a la más antigua
+        """
+        return list(reversed(self.recent))
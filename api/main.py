@@ -11,10 +11,15 @@ from loguru import logger
 sys.path.append(os.path.dirname(__file__))
 
 from router.router import router as products_router
+from router.admin_router import router as admin_router
 from config.core import settings
-from config.database import get_mongo_client
+from config.database import get_shared_client
+from config.logging_config import configure_logging
+from middleware.access_log import install_access_log
+from middleware.profiling import install_profiling
+from middleware.response_cache import install_response_cache
 
-logger.add("app.log", rotation="500 MB", level=settings.LOG_LEVEL)
+configure_logging(settings.LOG_FILE, level=settings.LOG_LEVEL, serialize=settings.LOG_JSON)
 
 def load_openapi_spec():
     """
@@ -55,15 +60,40 @@ if openapi_spec:
     app.openapi_schema = openapi_spec
     logger.info("Especificación OpenAPI cargada desde openapi.yaml")
 
+# La caché se registra antes que el perfilador para quedar por dentro: nunca guarda sus perfiles
+if settings.RESPONSE_CACHE_ENABLED:
+    install_response_cache(app)
+    logger.info("Caché de respuestas habilitada")
+
+if settings.PROFILING_ENABLED:
+    install_profiling(
+        app,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        output_dir=settings.PROFILING_DIR,
+        interval_ms=settings.PROFILING_INTERVAL_MS,
+        max_files=settings.PROFILING_MAX_FILES
+    )
+    logger.info("Perfilado por petición habilitado")
+
+# CORS queda por fuera de la caché y del perfilador: sus cabeceras dependen del Origin de cada petición
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
 
+# Se registra al final para quedar por fuera del resto y medir la latencia completa
+install_access_log(
+    app,
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    slow_ms=settings.ACCESS_LOG_SLOW_MS
+)
+
 app.include_router(products_router)
+app.include_router(admin_router)
 
 @app.get("/", tags=["Health"])
 async def root():
@@ -98,7 +128,7 @@ async def health_check():
     }
     
     try:
-        client = get_mongo_client()
+        client = get_shared_client()
         client.admin.command('ping')
         health_status["components"]["mongodb"] = {
             "status": "up",
@@ -151,8 +181,8 @@ def start_server():
         reload=True,
         reload_dirs=["."],
         log_level="info",
-        access_log=True,
-        use_colors=True,
+        access_log=False,
+        use_colors=False,
     )
 
 
@@ -0,0 +1,137 @@
+import itertools
+import os
+import random
+import time
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi import FastAPI
+from loguru import logger
+
+from config.logging_config import request_id_context
+from middleware.profiling import PROFILE_TOKEN_PARAM
+
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_REQUEST_ID_KEY = REQUEST_ID_HEADER.lower().encode("latin-1")
+
+# Prefijo aleatorio por proceso más un contador: único entre workers y sin costo de uuid4
+_REQUEST_ID_PREFIX = os.urandom(6).hex()
+_request_counter = itertools.count(1)
+
+# Parámetros de query cuyo valor nunca se escribe en el log de acceso
+SENSITIVE_PARAMS = frozenset({PROFILE_TOKEN_PARAM, "token", "access_token", "api_key", "password"})
+REDACTED = "***"
+
+
+def _redacted_query(query_string: bytes) -> str:
+    """
+    Devuelve el query string con los valores sensibles reemplazados por REDACTED.
+
+    Args:
+        query_string: Query string crudo del scope ASGI
+
+    Returns:
+        str: Query string apto para el log
+    """
+    query = query_string.decode("latin-1")
+    if not query:
+        return query
+    pairs = parse_qsl(query, keep_blank_values=True)
+    if not any(name.lower() in SENSITIVE_PARAMS for name, _ in pairs):
+        return query
+    return urlencode([
+        (name, REDACTED if name.lower() in SENSITIVE_PARAMS else value)
+        for name, value in pairs
+    ], safe="*")
+
+
+class AccessLogMiddleware:
+    """
+    Middleware ASGI de log de acceso estructurado.
+
+    Se implementa sobre ASGI directamente (no con @app.middleware("http")) porque
+    corre en todas las peticiones y BaseHTTPMiddleware cuesta más que el propio log.
+    El request id se publica en una ContextVar que loguru solo lee al emitir un log.
+    """
+
+    def __init__(self, app, sample_rate: float = 0.01, slow_ms: float = 500.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next(
+            (value.decode("latin-1") for key, value in scope["headers"] if key == _REQUEST_ID_KEY),
+            None
+        ) or f"{_REQUEST_ID_PREFIX}-{next(_request_counter):x}"
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (_REQUEST_ID_KEY, request_id.encode("latin-1"))]
+            await send(message)
+
+        token = request_id_context.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            self._log(scope, request_id, 500, started, failed=True)
+            raise
+        else:
+            self._log(scope, request_id, status_code, started)
+        finally:
+            request_id_context.reset(token)
+
+    def _log(self, scope, request_id: str, status_code: int, started: float, failed: bool = False):
+        latency_ms = (time.perf_counter() - started) * 1000
+        if failed or status_code >= 500:
+            level = "ERROR"
+        elif status_code >= 400 or latency_ms >= self.slow_ms:
+            level = "WARNING"
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            level = "INFO"
+        else:
+            return
+
+        client = scope.get("client")
+        bound = logger.bind(
+            request_id=request_id,
+            method=scope["method"],
+            path=scope["path"],
+            query=_redacted_query(scope.get("query_string", b"")),
+            status=status_code,
+            latency_ms=round(latency_ms, 2),
+            client=client[0] if client else None,
+            sampled=level == "INFO"
+        )
+        message = f"{scope['method']} {scope['path']} {status_code} {latency_ms:.1f} ms"
+        if failed:
+            bound.opt(exception=True).error(f"{message} (excepción no controlada)")
+        else:
+            bound.log(level, message)
+
+
+def install_access_log(app: FastAPI, sample_rate: float = 0.01, slow_ms: float = 500.0):
+    """
+    Registra el middleware de log de acceso estructurado.
+
+    Cada petición recibe un request id (el de la cabecera X-Request-ID o uno
+    nuevo), que se devuelve en la respuesta y se agrega a todos los logs emitidos
+    durante la petición. Las respuestas con error (4xx y 5xx) y las que superan
+    `slow_ms` siempre se registran; las exitosas solo en la fracción `sample_rate`.
+    La latencia se mide hasta el envío completo de la respuesta.
+
+    Args:
+        app: Aplicación FastAPI
+        sample_rate: Fracción de peticiones exitosas registradas (0 a 1)
+        slow_ms: Latencia en milisegundos a partir de la cual una petición siempre se registra
+    """
+    app.add_middleware(AccessLogMiddleware, sample_rate=sample_rate, slow_ms=slow_ms)
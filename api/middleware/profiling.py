@@ -0,0 +1,205 @@
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, Response
+from loguru import logger
+
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_FORMAT_HEADER = "X-Profile-Format"
+PROFILE_TOKEN_PARAM = "profile_token"
+PROFILE_FORMAT_PARAM = "profile_format"
+INLINE_FORMAT = "collapsed"
+
+
+class StackSampler:
+    """
+    Perfilador por muestreo de un hilo.
+
+    Un hilo auxiliar lee periódicamente la pila del hilo objetivo y acumula las
+    pilas en formato "collapsed" (una línea `frame;frame;frame conteo` por pila),
+    compatible con flamegraph.pl y speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{code.co_firstlineno}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """
+        Returns:
+            str: Pilas acumuladas en formato collapsed, de la más a la menos frecuente
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+def _requested_by_token(request: Request, token: Optional[str]) -> bool:
+    if not token:
+        return False
+    provided = request.headers.get(PROFILE_TOKEN_HEADER) or request.query_params.get(PROFILE_TOKEN_PARAM)
+    return bool(provided) and hmac.compare_digest(provided, token)
+
+
+def _profile_filename(request: Request) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", request.url.path).strip("_") or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{request.method}-{slug}-{uuid.uuid4().hex[:8]}.folded"
+
+
+def _prune_profiles(output_dir: str, max_files: int):
+    """
+    Borra los perfiles más antiguos hasta dejar como máximo `max_files`.
+
+    Args:
+        output_dir: Directorio de los perfiles
+        max_files: Número máximo de perfiles conservados (0 o menos: sin límite)
+    """
+    if max_files <= 0:
+        return
+    with os.scandir(output_dir) as entries:
+        profiles = [entry for entry in entries if entry.is_file() and entry.name.endswith(".folded")]
+    if len(profiles) <= max_files:
+        return
+    profiles.sort(key=lambda entry: entry.stat().st_mtime_ns)
+    for entry in profiles[:len(profiles) - max_files]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+class _RequestCounter:
+    """Peticiones en curso y peticiones iniciadas, para detectar perfiles con tráfico concurrente."""
+
+    def __init__(self):
+        self.active = 0
+        self.started = 0
+
+
+def install_profiling(
+    app: FastAPI,
+    token: Optional[str] = None,
+    sample_rate: float = 0.0,
+    output_dir: str = "profiles",
+    interval_ms: float = 1.0,
+    max_files: int = 100
+):
+    """
+    Registra el middleware de perfilado por petición.
+
+    Una petición se perfila si trae el token privilegiado (cabecera X-Profile-Token
+    o parámetro profile_token) o si cae en la fracción muestreada `sample_rate`.
+    El perfil se escribe en `output_dir`; las peticiones con token pueden pedirlo
+    en la respuesta con X-Profile-Format: collapsed (o profile_format=collapsed).
+    Solo debe llamarse cuando el perfilado está habilitado: sin registrar el
+    middleware el costo por petición es nulo.
+
+    El muestreo lee la pila del hilo del event loop, que atiende a todas las
+    peticiones: un perfil solo describe a su petición si no hubo tráfico
+    concurrente. Los perfiles con peticiones solapadas se marcan con la cabecera
+    X-Profile-Concurrent-Requests (y en el log) para poder descartarlos.
+    Se conservan como máximo `max_files` perfiles; los más antiguos se borran.
+
+    Args:
+        app: Aplicación FastAPI
+        token: Token que habilita el perfilado bajo demanda
+        sample_rate: Fracción de peticiones perfiladas automáticamente (0 a 1)
+        output_dir: Directorio donde se escriben los perfiles
+        interval_ms: Intervalo de muestreo en milisegundos
+        max_files: Número máximo de perfiles conservados en `output_dir` (0: sin límite)
+    """
+    interval = interval_ms / 1000.0
+    requests = _RequestCounter()
+
+    @app.middleware("http")
+    async def profiling_middleware(request: Request, call_next):
+        requests.active += 1
+        requests.started += 1
+        try:
+            return await _dispatch(request, call_next)
+        finally:
+            requests.active -= 1
+
+    async def _dispatch(request: Request, call_next):
+        by_token = _requested_by_token(request, token)
+        if not by_token and not (sample_rate > 0 and random.random() < sample_rate):
+            return await call_next(request)
+
+        # Peticiones en curso al empezar (sin contar esta) más las que empiecen mientras se perfila
+        already_active = requests.active - 1
+        started_before = requests.started
+        sampler = StackSampler(threading.get_ident(), interval)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+        finally:
+            sampler.stop()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        collapsed = sampler.collapsed()
+        concurrent = already_active + requests.started - started_before
+
+        output_format = request.headers.get(PROFILE_FORMAT_HEADER) or request.query_params.get(PROFILE_FORMAT_PARAM)
+        if by_token and output_format == INLINE_FORMAT:
+            return PlainTextResponse(
+                collapsed,
+                headers={
+                    "X-Profile-Samples": str(sum(sampler.samples.values())),
+                    "X-Profile-Duration-Ms": f"{elapsed_ms:.2f}",
+                    "X-Profile-Concurrent-Requests": str(concurrent),
+                    "X-Profiled-Status": str(response.status_code)
+                }
+            )
+
+        headers = dict(response.headers)
+        headers.pop("content-length", None)
+        headers["X-Profile-Concurrent-Requests"] = str(concurrent)
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            path = os.path.join(output_dir, _profile_filename(request))
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(collapsed)
+            _prune_profiles(output_dir, max_files)
+            headers["X-Profile-File"] = os.path.basename(path)
+            note = f", {concurrent} peticiones concurrentes" if concurrent else ""
+            logger.info(f"Perfil de {request.method} {request.url.path} ({elapsed_ms:.2f} ms{note}) guardado en {path}")
+        except OSError as e:
+            logger.error(f"No se pudo guardar el perfil de {request.url.path}: {e}")
+
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=headers,
+            media_type=response.media_type
+        )
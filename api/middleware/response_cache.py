@@ -0,0 +1,330 @@
+import hashlib
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Set
+from urllib.parse import urlencode
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+from config.core import settings
+from middleware.profiling import PROFILE_TOKEN_HEADER, PROFILE_TOKEN_PARAM
+
+
+CACHE_STATUS_HEADER = "X-Cache"
+
+# Los clientes y CDN deben revalidar siempre: la invalidación por escritura solo alcanza a esta caché
+CACHE_CONTROL = "no-cache"
+
+# Cuerpos más grandes no se parsean para el ETag: se usa un hash del cuerpo
+_ETAG_PARSE_LIMIT = 64 * 1024
+
+# Cabeceras que dependen de la respuesta original y no deben reutilizarse
+_SKIPPED_HEADERS = {"content-length", "date", "server", "cache-control", "age", "etag"}
+
+
+class _Entry:
+    __slots__ = ("body", "status_code", "headers", "media_type", "family", "stored_at", "expires_at")
+
+    def __init__(self, body: bytes, status_code: int, headers: Dict[str, str], media_type: Optional[str],
+                 family: str, stored_at: float, expires_at: float):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers
+        self.media_type = media_type
+        self.family = family
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+
+def cache_family(path: str, prefix: str = "/api/products") -> Optional[str]:
+    """
+    Asigna una ruta GET a la familia de claves que la invalida.
+
+    Args:
+        path: Ruta de la petición
+        prefix: Prefijo del router de productos
+
+    Returns:
+        Optional[str]: "list", "category:<categoría>", "product:<id>", "similar" u "other";
+        None si la ruta no se cachea
+    """
+    if not path.startswith(prefix):
+        return None
+    parts = [part for part in path[len(prefix):].split("/") if part]
+    if not parts:
+        return "list"
+    if parts[0] == "category" and len(parts) >= 2:
+        return f"category:{parts[1].lower()}"
+    if len(parts) == 1:
+        return f"product:{parts[0]}"
+    if len(parts) == 2 and parts[1] == "similar":
+        return "similar"
+    return "other"
+
+
+def entity_tag(body: bytes) -> str:
+    """
+    Calcula el ETag de una respuesta.
+
+    Si el cuerpo es un producto o una lista de productos de hasta 64 KiB, el ETag
+    se construye con los pares (id, version) y cambia con cada escritura; en otro
+    caso se usa un hash del cuerpo.
+
+    Args:
+        body: Cuerpo JSON de la respuesta
+
+    Returns:
+        str: ETag débil (W/"...")
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    payload = None
+    if len(body) <= _ETAG_PARSE_LIMIT:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            pass
+    items = payload if isinstance(payload, list) else [payload]
+    versions = [
+        f"{item['id']}:{item['version']};" for item in items
+        if isinstance(item, dict) and "id" in item and "version" in item
+    ]
+    if versions and len(versions) == len(items):
+        digest.update("".join(versions).encode("utf-8"))
+    else:
+        digest.update(body)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _profiled(request: Request) -> bool:
+    return PROFILE_TOKEN_HEADER in request.headers or PROFILE_TOKEN_PARAM in request.query_params
+
+
+class ResponseCache:
+    """
+    Caché LRU de respuestas ya serializadas, acotada en bytes y con TTL.
+
+    Las entradas se agrupan por familia de claves (ver `cache_family`) para que
+    cada escritura invalide solo las familias afectadas. Cada respuesta en cálculo
+    toma un número de secuencia con `begin`; no se guarda si su familia se
+    invalidó después. Las marcas de invalidación solo se conservan mientras
+    alguna respuesta en cálculo sea anterior a ellas, así que su memoria no crece
+    con la cantidad de productos escritos.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size_bytes = 0
+        self.metrics = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._families: Dict[str, Set[str]] = {}
+        self._sequence = 0
+        # Familia (o comodín) -> secuencia de su última invalidación
+        self._invalidated: Dict[str, int] = {}
+        # Secuencias tomadas por respuestas que se están calculando
+        self._inflight: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def begin(self) -> int:
+        """
+        Registra una respuesta que empieza a calcularse. Debe liberarse con `release`.
+
+        Returns:
+            int: Secuencia a pasar a `put`
+        """
+        with self._lock:
+            self._inflight[self._sequence] += 1
+            return self._sequence
+
+    def release(self, sequence: int):
+        with self._lock:
+            self._inflight[sequence] -= 1
+            if self._inflight[sequence] <= 0:
+                del self._inflight[sequence]
+            self._prune_invalidations()
+
+    def _invalidated_since(self, family: str, sequence: int) -> bool:
+        wildcard = family.split(":", 1)[0] + ":*"
+        return max(self._invalidated.get(family, -1), self._invalidated.get(wildcard, -1)) > sequence
+
+    def _prune_invalidations(self):
+        # Una marca solo afecta a respuestas que empezaron antes que ella
+        if not self._inflight:
+            self._invalidated.clear()
+        elif len(self._invalidated) > 1024:
+            oldest = min(self._inflight)
+            self._invalidated = {family: mark for family, mark in self._invalidated.items() if mark > oldest}
+
+    def get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics["hits"] += 1
+            return entry
+
+    def put(self, key: str, family: str, sequence: int, body: bytes, status_code: int,
+            headers: Dict[str, str], media_type: Optional[str]) -> bool:
+        if len(body) > self.max_bytes:
+            return False
+        with self._lock:
+            if self._invalidated_since(family, sequence):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            now = time.monotonic()
+            self._entries[key] = _Entry(body, status_code, headers, media_type, family, now, now + self.ttl_seconds)
+            self._families.setdefault(family, set()).add(key)
+            self.size_bytes += len(body)
+            self.metrics["stores"] += 1
+            while self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.metrics["evictions"] += 1
+            return True
+
+    def invalidate(self, *families: str):
+        """
+        Elimina las entradas de las familias indicadas. Una familia terminada en
+        ":*" invalida todas las que comparten ese prefijo (por ejemplo "category:*").
+
+        Args:
+            families: Familias a invalidar
+        """
+        with self._lock:
+            self._sequence += 1
+            for family in families:
+                if self._inflight:
+                    self._invalidated[family] = self._sequence
+                if family.endswith(":*"):
+                    targets = [name for name in self._families if name.startswith(family[:-1])]
+                else:
+                    targets = [family]
+                for target in targets:
+                    for key in self._families.pop(target, set()):
+                        self._remove(key, keep_family=True)
+            self.metrics["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._families.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Métricas de aciertos, fallos, entradas y bytes ocupados
+        """
+        with self._lock:
+            lookups = self.metrics["hits"] + self.metrics["misses"]
+            return {
+                **self.metrics,
+                "hit_ratio": round(self.metrics["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+    def _remove(self, key: str, keep_family: bool = False):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size_bytes -= len(entry.body)
+        if not keep_family:
+            keys = self._families.get(entry.family)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._families[entry.family]
+
+
+response_cache = ResponseCache(
+    max_bytes=int(settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024),
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+
+
+def install_response_cache(app: FastAPI, cache: ResponseCache = response_cache, prefix: str = "/api/products"):
+    """
+    Registra el middleware que sirve las respuestas GET del router de productos desde la caché.
+
+    Solo se guardan respuestas 200. La clave es la ruta más la query normalizada
+    (parámetros ordenados). Las respuestas cacheables incluyen X-Cache: HIT o MISS,
+    un ETag y Cache-Control: no-cache, de modo que los clientes revalidan con
+    If-None-Match (304) en vez de reutilizar una copia que la invalidación no
+    alcanza. Las peticiones con token de perfilado no se sirven ni se guardan.
+
+    Args:
+        app: Aplicación FastAPI
+        cache: Caché a utilizar
+        prefix: Prefijo de las rutas cacheables
+    """
+
+    @app.middleware("http")
+    async def response_cache_middleware(request: Request, call_next):
+        family = cache_family(request.url.path, prefix) if request.method == "GET" else None
+        if family is None or _profiled(request):
+            return await call_next(request)
+
+        key = request.url.path
+        if request.query_params:
+            key += "?" + urlencode(sorted(request.query_params.multi_items()))
+
+        entry = cache.get(key)
+        if entry is not None:
+            headers = {
+                **entry.headers,
+                "Cache-Control": CACHE_CONTROL,
+                "Age": str(int(time.monotonic() - entry.stored_at)),
+                CACHE_STATUS_HEADER: "HIT"
+            }
+            if _not_modified(request, entry.headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+            return Response(
+                content=entry.body,
+                status_code=entry.status_code,
+                headers=headers,
+                media_type=entry.media_type
+            )
+
+        sequence = cache.begin()
+        try:
+            response = await call_next(request)
+            if response.status_code != 200:
+                return response
+
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            headers = {name: value for name, value in response.headers.items() if name.lower() not in _SKIPPED_HEADERS}
+            if len(body) <= cache.max_bytes:
+                headers["ETag"] = entity_tag(body)
+                cache.put(key, family, sequence, body, response.status_code, headers, response.media_type)
+        finally:
+            cache.release(sequence)
+
+        headers = {**headers, "Cache-Control": CACHE_CONTROL, CACHE_STATUS_HEADER: "MISS"}
+        if "ETag" in headers and _not_modified(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=headers,
+            media_type=response.media_type
+        )
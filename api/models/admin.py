@@ -0,0 +1,33 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class SlowQuery(BaseModel):
+    """Comando de MongoDB que superó el umbral de consulta lenta."""
+    timestamp: str = Field(..., description="Momento en que terminó el comando (UTC)")
+    database: str = Field(..., description="Base de datos del comando")
+    command_name: str = Field(..., description="Nombre del comando (find, aggregate, update...)")
+    duration_ms: float = Field(..., description="Duración en milisegundos")
+    command: Dict[str, Any] = Field(..., description="Forma del comando con los valores redactados")
+    error: Optional[str] = Field(None, description="Error devuelto por el servidor, si lo hubo")
+    explain: Optional[Dict[str, Any]] = Field(None, description="Resumen del explain (etapas, índices, documentos examinados)")
+
+
+class SlowQueryReport(BaseModel):
+    """Consultas lentas recientes registradas por el proceso."""
+    threshold_ms: float
+    queries: List[SlowQuery]
+
+
+class ResponseCacheStats(BaseModel):
+    """Métricas de la caché de respuestas del proceso."""
+    hits: int
+    misses: int
+    stores: int
+    evictions: int
+    invalidations: int
+    hit_ratio: float = Field(..., description="Aciertos sobre el total de búsquedas")
+    entries: int = Field(..., description="Respuestas guardadas")
+    size_bytes: int = Field(..., description="Bytes ocupados por los cuerpos guardados")
+    max_bytes: int
+    ttl_seconds: float
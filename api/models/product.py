@@ -17,6 +17,7 @@ class ProductDetail(ProductBase):
     category: str = Field(..., description="Categoría del producto")
     rating: Optional[float] = Field(None, ge=0, le=5, description="Calificación de 0 a 5")
     specs: Dict[str, str] = Field(default_factory=dict, description="Especificaciones técnicas")
+    version: int = Field(0, ge=0, description="Versión del documento, se incrementa en cada escritura")
 
 
 class ProductCreateRequest(ProductBase):
@@ -38,6 +39,25 @@ class ProductUpdateRequest(BaseModel):
     specs: Optional[Dict[str, str]] = None
 
 
+class BulkPriceUpdateItem(BaseModel):
+    """Cambio de precio individual dentro de una actualización masiva."""
+    id: str = Field(..., description="ID del producto")
+    price: float = Field(..., gt=0, description="Nuevo precio del producto")
+
+
+class BulkPriceUpdateRequest(BaseModel):
+    """Request para actualizar precios de múltiples productos."""
+    updates: List[BulkPriceUpdateItem] = Field(..., min_length=1, max_length=10000, description="Cambios de precio a aplicar (1-10000)")
+
+
+class BulkPriceUpdateResponse(BaseModel):
+    """Respuesta de la actualización masiva de precios."""
+    message: str
+    matched_count: int
+    modified_count: int
+    invalid_ids: List[str] = Field(default_factory=list)
+
+
 class ProductCompareRequest(BaseModel):
     """Request para comparar múltiples productos."""
     product_ids: List[str] = Field(..., min_items=2, max_items=5, description="IDs de productos a comparar (2-5 productos)")
@@ -47,4 +67,21 @@ class ProductCompareResponse(BaseModel):
     """Respuesta de comparación de productos."""
     message: str
     products: List[ProductDetail]
-    comparison_summary: Dict[str, str]
\ No newline at end of file
+    comparison_summary: Dict[str, str]
+
+
+class BrandCount(BaseModel):
+    """Número de productos de una marca dentro de una categoría."""
+    brand: str
+    count: int
+
+
+class CategoryStats(BaseModel):
+    """Resumen materializado de una categoría."""
+    category: str = Field(..., description="Nombre de la categoría")
+    product_count: int = Field(..., description="Número de productos")
+    min_price: float = Field(..., description="Precio mínimo")
+    max_price: float = Field(..., description="Precio máximo")
+    avg_price: float = Field(..., description="Precio promedio")
+    avg_rating: Optional[float] = Field(None, description="Calificación promedio de los productos calificados")
+    top_brands: List[BrandCount] = Field(default_factory=list, description="Marcas con más productos")
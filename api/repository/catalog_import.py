@@ -0,0 +1,330 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config.database import get_collection
+from models.product import ProductCreateRequest
+from repository.category_stats_repository import rebuild_category_stats
+from repository.product_repository import mark_catalog_changed
+
+
+Row = Tuple[int, dict]
+
+MAX_REPORTED_ERRORS = 20
+
+
+def detect_format(path: str) -> str:
+    """
+    Deduce el formato del archivo por su extensión.
+
+    Args:
+        path: Ruta del archivo
+
+    Returns:
+        str: "csv" o "jsonl"
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Formato no soportado para {path}: use --format csv|jsonl")
+
+
+def read_rows(path: str, file_format: str, skip: int = 0) -> Iterator[Row]:
+    """
+    Lee el archivo fila por fila sin cargarlo completo en memoria.
+
+    Args:
+        path: Ruta del archivo
+        file_format: "csv" o "jsonl"
+        skip: Número de filas ya importadas que se deben omitir
+
+    Yields:
+        Row: Número de fila (desde 1) y contenido crudo
+    """
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            rows = csv.DictReader(file)
+        else:
+            rows = (line for line in file if line.strip())
+
+        for number, row in enumerate(rows, start=1):
+            if number <= skip:
+                continue
+            yield number, row
+
+
+def chunked(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    """
+    Agrupa las filas en bloques de `size` elementos.
+    """
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _normalize_row(raw) -> dict:
+    row = json.loads(raw) if isinstance(raw, str) else dict(raw)
+    if not isinstance(row, dict):
+        raise ValueError("La fila no es un objeto JSON")
+
+    # csv.DictReader guarda los campos que sobran respecto del encabezado bajo la clave None
+    extra = row.pop(None, None)
+    if extra is not None:
+        raise ValueError(f"La fila tiene {len(extra)} campos más que el encabezado")
+
+    specs = row.pop("specs", None) or {}
+    if isinstance(specs, str):
+        specs = json.loads(specs)
+    if not isinstance(specs, dict):
+        raise ValueError("specs debe ser un objeto")
+    for key in [key for key in row if key.startswith("specs.")]:
+        value = row.pop(key)
+        if value not in (None, ""):
+            specs[key[len("specs."):]] = value
+    row["specs"] = {key: str(value) for key, value in specs.items()}
+
+    return {key: (None if value == "" else value) for key, value in row.items()}
+
+
+def validate_chunk(chunk: List[Row], sku_field: Optional[str]) -> Tuple[List[dict], List[Tuple[int, str]]]:
+    """
+    Valida un bloque de filas contra ProductCreateRequest. Se ejecuta en los procesos de trabajo.
+
+    Args:
+        chunk: Filas crudas con su número de fila
+        sku_field: Campo con el SKU externo (None para insertar sin clave)
+
+    Returns:
+        Tuple[List[dict], List[Tuple[int, str]]]: Documentos válidos y errores por fila
+    """
+    documents = []
+    errors = []
+
+    for number, raw in chunk:
+        try:
+            row = _normalize_row(raw)
+            sku = row.get(sku_field) if sku_field else None
+            if sku_field and not sku:
+                raise ValueError(f"Falta el SKU ({sku_field})")
+
+            document = ProductCreateRequest(**row).dict()
+            if sku_field:
+                document["sku"] = str(sku)
+            documents.append(document)
+        except ValidationError as e:
+            errors.append((number, "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())))
+        except (ValueError, TypeError, AttributeError) as e:
+            errors.append((number, str(e)))
+
+    return documents, errors
+
+
+def write_chunk(collection, documents: List[dict], upsert: bool) -> Dict[str, int]:
+    """
+    Escribe un bloque con un solo bulk_write no ordenado.
+
+    Args:
+        collection: Colección de productos
+        documents: Documentos validados
+        upsert: Si es True hace upsert por SKU; si no, inserta
+
+    Returns:
+        Dict[str, int]: Conteo de documentos insertados, actualizados y fallidos
+    """
+    if not documents:
+        return {"inserted": 0, "updated": 0, "failed": 0}
+
+    if upsert:
+        operations = [
+            UpdateOne({"sku": document["sku"]}, {"$set": document, "$inc": {"version": 1}}, upsert=True)
+            for document in documents
+        ]
+    else:
+        operations = [InsertOne({**document, "version": 1}) for document in documents]
+
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        return {"inserted": result.inserted_count + result.upserted_count, "updated": result.modified_count, "failed": 0}
+    except BulkWriteError as e:
+        details = e.details
+        write_errors = details.get("writeErrors", [])
+        logger.warning(f"{len(write_errors)} escrituras fallidas en el bloque: {write_errors[0]['errmsg'] if write_errors else details}")
+        return {
+            "inserted": details.get("nInserted", 0) + details.get("nUpserted", 0),
+            "updated": details.get("nModified", 0),
+            "failed": len(write_errors)
+        }
+
+
+def load_checkpoint(path: str, source: str) -> int:
+    """
+    Returns:
+        int: Filas ya importadas según el checkpoint (0 si no existe o es de otro archivo)
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            checkpoint = json.load(file)
+    except FileNotFoundError:
+        return 0
+    if checkpoint.get("source") != os.path.abspath(source):
+        raise ValueError(f"El checkpoint {path} corresponde a otro archivo: {checkpoint.get('source')}")
+    return int(checkpoint.get("rows_done", 0))
+
+
+def save_checkpoint(path: str, source: str, rows_done: int, totals: Dict[str, int]):
+    """
+    Guarda el avance de forma atómica (archivo temporal y os.replace).
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump({"source": os.path.abspath(source), "rows_done": rows_done, "totals": totals}, file)
+    os.replace(temporary, path)
+
+
+def _validated_chunks(chunks: Iterator[List[Row]], sku_field: Optional[str], workers: int):
+    """
+    Valida los bloques en procesos de trabajo conservando el orden y con un número
+    acotado de bloques en vuelo, para que la memoria no crezca con el tamaño del archivo.
+    """
+    if workers <= 0:
+        for chunk in chunks:
+            yield chunk[-1][0], validate_chunk(chunk, sku_field)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk[-1][0], executor.submit(validate_chunk, chunk, sku_field)))
+            if len(pending) >= workers * 2:
+                last_row, future = pending.popleft()
+                yield last_row, future.result()
+        while pending:
+            last_row, future = pending.popleft()
+            yield last_row, future.result()
+
+
+def import_catalog(
+    path: str,
+    file_format: Optional[str] = None,
+    sku_field: Optional[str] = None,
+    chunk_size: int = 1000,
+    workers: int = 0,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = False,
+    collection=None
+) -> Dict[str, int]:
+    """
+    Importa un catálogo CSV o JSONL en streaming.
+
+    Args:
+        path: Ruta del archivo
+        file_format: "csv" o "jsonl" (por defecto según la extensión)
+        sku_field: Campo con el SKU externo; si se indica se hace upsert por SKU
+        chunk_size: Filas por bloque de escritura
+        workers: Procesos de validación (0 valida en el proceso actual)
+        checkpoint_path: Archivo de checkpoint (por defecto <archivo>.checkpoint.json)
+        resume: Si es True continúa desde el checkpoint existente
+        collection: Colección destino (por defecto "products")
+
+    Returns:
+        Dict[str, int]: Totales de filas leídas, insertadas, actualizadas, inválidas y fallidas
+    """
+    file_format = file_format or detect_format(path)
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+    collection = collection if collection is not None else get_collection("products")
+
+    if sku_field:
+        collection.create_index("sku", unique=True, sparse=True)
+
+    rows_done = load_checkpoint(checkpoint_path, path) if resume else 0
+    if rows_done:
+        logger.info(f"Reanudando {path} desde la fila {rows_done + 1}")
+
+    totals = {"rows": rows_done, "inserted": 0, "updated": 0, "invalid": 0, "failed": 0}
+    started = time.perf_counter()
+    reported_errors = 0
+
+    chunks = chunked(read_rows(path, file_format, skip=rows_done), chunk_size)
+    for last_row, (documents, errors) in _validated_chunks(chunks, sku_field, workers):
+        written = write_chunk(collection, documents, upsert=bool(sku_field))
+
+        for number, message in errors:
+            if reported_errors < MAX_REPORTED_ERRORS:
+                logger.warning(f"Fila {number} inválida: {message}")
+                reported_errors += 1
+
+        totals["inserted"] += written["inserted"]
+        totals["updated"] += written["updated"]
+        totals["failed"] += written["failed"]
+        totals["invalid"] += len(errors)
+        processed = last_row - totals["rows"]
+        totals["rows"] = last_row
+
+        save_checkpoint(checkpoint_path, path, last_row, totals)
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"{totals['rows']} filas procesadas (+{processed}), "
+            f"{(totals['rows'] - rows_done) / elapsed:,.0f} filas/s"
+        )
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Importación completada en {elapsed:.1f} s: {totals['inserted']} insertados, "
+        f"{totals['updated']} actualizados, {totals['invalid']} inválidos, {totals['failed']} fallidos"
+    )
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Importa un catálogo de productos desde CSV o JSONL.")
+    parser.add_argument("path", help="Archivo CSV o JSONL")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Formato del archivo (por defecto según la extensión)")
+    parser.add_argument("--sku-field", help="Campo con el SKU externo; activa upserts por SKU")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Filas por bloque de escritura")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos de validación (0 = en proceso)")
+    parser.add_argument("--checkpoint", help="Archivo de checkpoint (por defecto <archivo>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true", help="Continuar desde el checkpoint existente")
+    parser.add_argument("--skip-stats", action="store_true", help="No reconstruir category_stats al terminar")
+    args = parser.parse_args(argv)
+
+    totals = import_catalog(
+        args.path,
+        file_format=args.format,
+        sku_field=args.sku_field,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume
+    )
+
+    if not args.skip_stats:
+        rebuild_category_stats()
+        logger.info("Estadísticas por categoría reconstruidas")
+
+    mark_catalog_changed()
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
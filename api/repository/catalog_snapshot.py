@@ -0,0 +1,234 @@
+import argparse
+import fcntl
+import mmap
+import os
+import sys
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from repository.catalog_store import CompactCatalog, read_snapshot_metadata
+
+
+class _MappedSnapshot:
+    """Snapshot abierto: mapeo del archivo, catálogo de solo lectura sobre él y sus metadatos."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            # El mapeo sigue siendo válido aunque el archivo sea reemplazado después
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.catalog, self.metadata = CompactCatalog.from_buffer(self.buffer)
+
+    @property
+    def version(self) -> int:
+        return self.metadata["version"]
+
+
+def _read_metadata(path: str) -> Optional[dict]:
+    try:
+        with open(path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return read_snapshot_metadata(buffer)[0]
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class SharedCatalogSnapshot:
+    """
+    Catálogo compacto compartido entre procesos mediante un archivo mapeado en memoria.
+
+    Un solo proceso a la vez (el que obtiene el candado del archivo `<ruta>.lock`)
+    reconstruye el catálogo, lo serializa en un archivo temporal y lo publica con
+    os.replace, incrementando su versión. Los demás procesos mapean el archivo y
+    leen las columnas directamente del mapeo, sin copiarlas; al detectar un archivo
+    nuevo cambian de versión reemplazando una sola referencia, mientras las
+    lecturas en curso terminan sobre el mapeo anterior.
+
+    El snapshot se reconstruye cuando supera `refresh_seconds` o cuando una
+    escritura lo marcó como desactualizado con `mark_dirty`. La reconstrucción
+    corre en un hilo auxiliar: mientras tanto se sigue sirviendo la versión anterior.
+    `on_swap` se llama con los metadatos de cada versión que el proceso empieza a usar.
+    """
+
+    def __init__(self, path: str, load_documents: Callable[[], Iterable[dict]],
+                 refresh_seconds: float = 60.0, check_interval: float = 0.5,
+                 on_swap: Optional[Callable[[dict], None]] = None):
+        self.path = path
+        self.load_documents = load_documents
+        self.refresh_seconds = refresh_seconds
+        self.check_interval = check_interval
+        self.on_swap = on_swap
+        self._current: Optional[_MappedSnapshot] = None
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @property
+    def lock_path(self) -> str:
+        return f"{self.path}.lock"
+
+    @property
+    def dirty_path(self) -> str:
+        return f"{self.path}.dirty"
+
+    @property
+    def version(self) -> Optional[int]:
+        """
+        Returns:
+            Optional[int]: Versión del snapshot que usa este proceso (None si aún no abrió ninguno)
+        """
+        return self._current.version if self._current is not None else None
+
+    def catalog(self) -> CompactCatalog:
+        """
+        Obtiene el catálogo de la versión publicada más reciente.
+
+        Si todavía no existe ningún snapshot, lo construye (o espera a que otro
+        proceso termine de construirlo).
+
+        Returns:
+            CompactCatalog: Catálogo de solo lectura
+        """
+        if self._current is None or time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            self._swap_if_changed()
+            if self._current is None:
+                self.refresh(blocking=True)
+                self._swap_if_changed()
+            elif self._is_stale(self._current.metadata):
+                self._refresh_in_background()
+
+        if self._current is None:
+            raise Exception(f"No se pudo abrir el snapshot del catálogo {self.path}")
+        return self._current.catalog
+
+    def mark_dirty(self):
+        """
+        Indica que el catálogo cambió en MongoDB; el siguiente chequeo de cualquier
+        proceso lanzará la reconstrucción.
+        """
+        self._ensure_directory()
+        now = time.time_ns()
+        with open(self.dirty_path, "a"):
+            pass
+        os.utime(self.dirty_path, ns=(now, now))
+        self._checked_at = 0.0
+
+    def refresh(self, blocking: bool = False) -> bool:
+        """
+        Reconstruye y publica el snapshot si este proceso obtiene el candado y el
+        snapshot publicado sigue desactualizado.
+
+        Args:
+            blocking: Si es True espera el candado; si no, desiste si otro proceso lo tiene
+
+        Returns:
+            bool: True si este proceso publicó una versión nueva
+        """
+        self._ensure_directory()
+        with open(self.lock_path, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return False
+            try:
+                published = _read_metadata(self.path)
+                if published is not None and not self._is_stale(published):
+                    return False
+                self._publish(published["version"] + 1 if published else 1)
+                return True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _ensure_directory(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _publish(self, version: int):
+        started = time.perf_counter()
+        built_at_ns = time.time_ns()
+        catalog = CompactCatalog.from_documents(self.load_documents())
+
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                catalog.dump(file, version=version, built_at_ns=built_at_ns)
+            os.replace(temporary, self.path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+        logger.info(
+            f"Snapshot del catálogo v{version} publicado en {self.path}: "
+            f"{len(catalog)} productos en {time.perf_counter() - started:.2f} s"
+        )
+
+    def _is_stale(self, metadata: dict) -> bool:
+        if time.time_ns() - metadata["built_at_ns"] >= self.refresh_seconds * 1e9:
+            return True
+        try:
+            return os.stat(self.dirty_path).st_mtime_ns >= metadata["built_at_ns"]
+        except FileNotFoundError:
+            return False
+
+    def _swap_if_changed(self):
+        signature = _signature(self.path)
+        if signature is None or (self._current is not None and self._current.signature == signature):
+            return
+        with self._lock:
+            if self._current is not None and self._current.signature == signature:
+                return
+            self._current = _MappedSnapshot(self.path)
+            metadata = self._current.metadata
+        if self.on_swap is not None:
+            try:
+                self.on_swap(metadata)
+            except Exception as e:
+                logger.warning(f"Error al notificar la versión {metadata['version']} del snapshot del catálogo: {str(e)}")
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                if self.refresh():
+                    self._checked_at = 0.0
+            except Exception as e:
+                logger.error(f"No se pudo reconstruir el snapshot del catálogo: {str(e)}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="catalog-snapshot-refresh", daemon=True).start()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from config.core import settings
+    from repository.product_repository import load_catalog_documents
+
+    parser = argparse.ArgumentParser(description="Publica el snapshot compartido del catálogo de productos.")
+    parser.add_argument("--path", default=settings.CATALOG_SNAPSHOT_PATH, help="Archivo del snapshot")
+    args = parser.parse_args(argv)
+
+    snapshot = SharedCatalogSnapshot(args.path, load_catalog_documents, refresh_seconds=0)
+    snapshot.refresh(blocking=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,514 @@
+import json
+import math
+import struct
+from array import array
+from bisect import bisect_left, insort
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from models.product import ProductDetail
+
+
+SNAPSHOT_MAGIC = b"CATSNAP1"
+
+# Firma del archivo y longitud de los metadatos JSON que le siguen
+_SNAPSHOT_HEADER = struct.Struct("<8sQ")
+
+# Columnas de ancho fijo y su formato de memoryview
+_FIXED_COLUMNS = {
+    "ids": "B",
+    "alive": "B",
+    "prices": "d",
+    "ratings": "d",
+    "versions": "i",
+    "brand_codes": "i",
+    "category_codes": "i",
+    "spec_offsets": "Q",
+    "spec_keys": "i"
+}
+
+_STRING_COLUMNS = ("names", "descriptions", "image_urls", "spec_values")
+
+# Longitud máxima de los rankings por categoría que se mantienen en memoria
+TOP_K_LIMIT = 50
+
+TOP_K_FIELDS = ("price", "rating")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def read_snapshot_metadata(buffer) -> Tuple[dict, int]:
+    """
+    Lee los metadatos de un snapshot serializado con `CompactCatalog.dump`.
+
+    Args:
+        buffer: Contenido del snapshot (bytes, mmap o memoryview), al menos su cabecera
+
+    Returns:
+        Tuple[dict, int]: Metadatos y posición donde empiezan las columnas
+    """
+    magic, length = _SNAPSHOT_HEADER.unpack_from(buffer, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("El archivo no es un snapshot de catálogo")
+    start = _SNAPSHOT_HEADER.size
+    metadata = json.loads(bytes(buffer[start:start + length]))
+    return metadata, _align(start + length)
+
+
+class _Interner:
+    """Tabla de valores repetidos (marcas, categorías, claves de specs) codificados como enteros."""
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = list(values or [])
+        self.codes: Dict[str, int] = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+
+class _StringColumn:
+    """Cadenas UTF-8 concatenadas en un solo buffer con un arreglo de offsets."""
+
+    def __init__(self, nullable: bool = False):
+        self.buffer = bytearray()
+        self.offsets = array("Q", [0])
+        self.nulls = bytearray() if nullable else None
+
+    def append(self, value: Optional[str]):
+        if self.nulls is not None:
+            self.nulls.append(value is None)
+        if value:
+            self.buffer += value.encode("utf-8")
+        self.offsets.append(len(self.buffer))
+
+    @classmethod
+    def from_views(cls, buffer, offsets, nulls=None) -> "_StringColumn":
+        column = cls.__new__(cls)
+        column.buffer = buffer
+        column.offsets = offsets
+        column.nulls = nulls
+        return column
+
+    def get(self, index: int) -> Optional[str]:
+        if self.nulls is not None and self.nulls[index]:
+            return None
+        return str(self.buffer[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.itemsize * len(self.offsets) + (len(self.nulls) if self.nulls is not None else 0)
+
+
+class _IdView:
+    """Vista indexable sobre los ObjectId binarios, para búsqueda binaria con bisect."""
+
+    def __init__(self, ids: bytearray, size: int):
+        self.ids = ids
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> bytes:
+        return bytes(self.ids[index * 12:(index + 1) * 12])
+
+
+class CompactCatalog:
+    """
+    Catálogo en memoria con representación columnar compacta.
+
+    Precio, calificación y versión viven en arreglos tipados; marca, categoría y
+    claves de specs se guardan como códigos enteros; nombre, descripción, URL y
+    valores de specs se concatenan en buffers UTF-8 contiguos. Los IDs son los 12
+    bytes del ObjectId. Los objetos ProductDetail solo se construyen al responder.
+
+    Las filas cargadas en orden de _id se buscan por bisección; las que llegan
+    fuera de orden (altas y actualizaciones posteriores) se indexan en un dict
+    pequeño. Las actualizaciones marcan la fila anterior como eliminada y
+    agregan una nueva.
+
+    Un catálogo puede serializarse con `dump` y abrirse con `from_buffer` sobre
+    un archivo mapeado en memoria; en ese caso las columnas son memoryviews de
+    solo lectura sobre el mapeo y no se copian.
+
+    Los rankings por categoría (`top`) guardan las TOP_K_LIMIT mejores filas. Se
+    calculan al primer uso y las escrituras los mantienen: una fila nueva entra
+    con una inserción ordenada y solo se recalcula el ranking completo cuando sale
+    una fila de un ranking lleno.
+    """
+
+    def __init__(self):
+        self.ids = bytearray()
+        self.alive = bytearray()
+        self.prices = array("d")
+        self.ratings = array("d")
+        self.versions = array("i")
+        self.brand_codes = array("i")
+        self.category_codes = array("i")
+        self.names = _StringColumn()
+        self.descriptions = _StringColumn(nullable=True)
+        self.image_urls = _StringColumn(nullable=True)
+        self.spec_offsets = array("Q", [0])
+        self.spec_keys = array("i")
+        self.spec_values = _StringColumn()
+        self.brands = _Interner()
+        self.categories = _Interner()
+        self.spec_names = _Interner()
+        self._sorted_rows = 0
+        self._overflow: Dict[bytes, int] = {}
+        self._live = 0
+        self._top: Dict[Tuple[str, str], List[int]] = {}
+
+    def __len__(self) -> int:
+        return self._live
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[dict]) -> "CompactCatalog":
+        """
+        Construye el catálogo a partir de documentos de MongoDB (idealmente ordenados por _id).
+
+        Args:
+            documents: Documentos con _id (o id) y los campos de ProductDetail
+
+        Returns:
+            CompactCatalog: Catálogo construido
+        """
+        catalog = cls()
+        for document in documents:
+            catalog.upsert(document)
+        return catalog
+
+    @classmethod
+    def from_buffer(cls, buffer) -> Tuple["CompactCatalog", dict]:
+        """
+        Abre un snapshot sin copiar sus columnas.
+
+        Args:
+            buffer: Snapshot serializado (típicamente un mmap de solo lectura)
+
+        Returns:
+            Tuple[CompactCatalog, dict]: Catálogo de solo lectura y metadatos del snapshot
+        """
+        metadata, start = read_snapshot_metadata(buffer)
+        view = memoryview(buffer)
+
+        def section(name: str, item_format: str = "B"):
+            offset, length = metadata["sections"][name]
+            return view[start + offset:start + offset + length].cast(item_format)
+
+        catalog = cls.__new__(cls)
+        for name, item_format in _FIXED_COLUMNS.items():
+            setattr(catalog, name, section(name, item_format))
+        for name in _STRING_COLUMNS:
+            nulls = section(f"{name}.nulls") if f"{name}.nulls" in metadata["sections"] else None
+            setattr(catalog, name, _StringColumn.from_views(section(f"{name}.buffer"), section(f"{name}.offsets", "Q"), nulls))
+        catalog.brands = _Interner(metadata["brands"])
+        catalog.categories = _Interner(metadata["categories"])
+        catalog.spec_names = _Interner(metadata["spec_names"])
+        catalog._sorted_rows = metadata["rows"]
+        catalog._overflow = {}
+        catalog._live = metadata["rows"]
+        catalog._top = {}
+        return catalog, metadata
+
+    def compacted(self) -> "CompactCatalog":
+        """
+        Returns:
+            CompactCatalog: El mismo catálogo si ya está ordenado y sin filas eliminadas;
+            si no, una copia con solo las filas vivas en orden de _id
+        """
+        if not self._overflow and self._live == len(self.alive):
+            return self
+        rows = sorted(self.rows(), key=lambda row: bytes(self.ids[row * 12:(row + 1) * 12]))
+        return CompactCatalog.from_documents(self.materialize(row).dict() for row in rows)
+
+    def dump(self, file: BinaryIO, **metadata):
+        """
+        Serializa el catálogo compactado: cabecera, metadatos JSON y columnas alineadas a 8 bytes.
+
+        Args:
+            file: Archivo binario de destino
+            metadata: Metadatos adicionales (versión, fecha de construcción...)
+        """
+        catalog = self.compacted()
+        columns = {name: getattr(catalog, name) for name in _FIXED_COLUMNS}
+        for name in _STRING_COLUMNS:
+            column = getattr(catalog, name)
+            columns[f"{name}.buffer"] = column.buffer
+            columns[f"{name}.offsets"] = column.offsets
+            if column.nulls is not None:
+                columns[f"{name}.nulls"] = column.nulls
+
+        sections = {}
+        offset = 0
+        for name, column in columns.items():
+            length = memoryview(column).nbytes
+            sections[name] = [offset, length]
+            offset = _align(offset + length)
+
+        encoded = json.dumps({
+            **metadata,
+            "rows": len(catalog),
+            "brands": catalog.brands.values,
+            "categories": catalog.categories.values,
+            "spec_names": catalog.spec_names.values,
+            "sections": sections
+        }).encode("utf-8")
+        header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(encoded)) + encoded
+        file.write(header + bytes(_align(len(header)) - len(header)))
+
+        for name, column in columns.items():
+            length = sections[name][1]
+            file.write(column)
+            file.write(bytes(_align(length) - length))
+
+    def _find_row(self, oid: bytes) -> Optional[int]:
+        row = self._overflow.get(oid)
+        if row is None and self._sorted_rows:
+            index = bisect_left(_IdView(self.ids, self._sorted_rows), oid)
+            if index < self._sorted_rows and self.ids[index * 12:(index + 1) * 12] == oid:
+                row = index
+        if row is None or not self.alive[row]:
+            return None
+        return row
+
+    def upsert(self, document: dict):
+        """
+        Agrega o reemplaza un producto.
+
+        Args:
+            document: Documento con _id (o id) y los campos de ProductDetail
+        """
+        oid = ObjectId(document["_id"] if "_id" in document else document["id"]).binary
+        row = len(self.alive)
+        in_order = self._sorted_rows == row and (row == 0 or oid > self.ids[(row - 1) * 12:row * 12])
+
+        # Un ID mayor que todos los ordenados solo puede existir ya en el índice de desborde
+        previous = self._overflow.pop(oid, None) if in_order else self._find_row(oid)
+        if previous is not None and self.alive[previous]:
+            self.alive[previous] = 0
+            self._live -= 1
+            self._top_removed(previous)
+
+        if in_order:
+            self._sorted_rows += 1
+        else:
+            self._overflow[oid] = row
+
+        self.ids += oid
+        self.alive.append(1)
+        self.prices.append(float(document["price"]))
+        rating = document.get("rating")
+        self.ratings.append(math.nan if rating is None else float(rating))
+        self.versions.append(int(document.get("version", 0)))
+        self.brand_codes.append(self.brands.code(document["brand"]))
+        self.category_codes.append(self.categories.code(document["category"]))
+        self.names.append(document["name"])
+        self.descriptions.append(document.get("description"))
+        self.image_urls.append(document.get("image_url"))
+
+        for key, value in (document.get("specs") or {}).items():
+            self.spec_keys.append(self.spec_names.code(key))
+            self.spec_values.append(str(value))
+        self.spec_offsets.append(len(self.spec_keys))
+
+        self._live += 1
+        self._top_added(row)
+
+    def remove(self, product_id: str) -> bool:
+        """
+        Elimina un producto.
+
+        Args:
+            product_id: ID del producto
+
+        Returns:
+            bool: True si el producto existía
+        """
+        try:
+            row = self._find_row(ObjectId(product_id).binary)
+        except Exception:
+            return False
+        if row is None:
+            return False
+        self.alive[row] = 0
+        self._live -= 1
+        self._top_removed(row)
+        return True
+
+    def update_price(self, product_id: str, price: float, version: Optional[int] = None) -> bool:
+        """
+        Cambia el precio de un producto en su lugar y actualiza su versión.
+
+        Con `version` la operación es idempotente: reaplicarla sobre un catálogo
+        recién recargado (que ya la incluye) deja la misma versión que MongoDB.
+
+        Args:
+            product_id: ID del producto
+            price: Nuevo precio
+            version: Versión resultante en MongoDB (sin ella se incrementa la actual)
+
+        Returns:
+            bool: True si el producto existía
+        """
+        try:
+            row = self._find_row(ObjectId(product_id).binary)
+        except Exception:
+            return False
+        if row is None:
+            return False
+        self._top_removed(row, ("price",))
+        self.prices[row] = float(price)
+        if version is None:
+            self.versions[row] += 1
+        else:
+            self.versions[row] = version
+        self._top_added(row, ("price",))
+        return True
+
+    def materialize(self, row: int) -> ProductDetail:
+        """
+        Construye el ProductDetail de una fila (los datos ya fueron validados al escribirse).
+        """
+        rating = self.ratings[row]
+        specs = {
+            self.spec_names.values[self.spec_keys[index]]: self.spec_values.get(index)
+            for index in range(self.spec_offsets[row], self.spec_offsets[row + 1])
+        }
+        return ProductDetail.model_construct(
+            id=str(ObjectId(bytes(self.ids[row * 12:(row + 1) * 12]))),
+            name=self.names.get(row),
+            brand=self.brands.values[self.brand_codes[row]],
+            price=self.prices[row],
+            image_url=self.image_urls.get(row),
+            description=self.descriptions.get(row),
+            category=self.categories.values[self.category_codes[row]],
+            rating=None if math.isnan(rating) else rating,
+            specs=specs,
+            version=self.versions[row]
+        )
+
+    def get(self, product_id: str) -> Optional[ProductDetail]:
+        """
+        Args:
+            product_id: ID del producto
+
+        Returns:
+            Optional[ProductDetail]: Producto o None si no existe
+        """
+        try:
+            row = self._find_row(ObjectId(product_id).binary)
+        except Exception:
+            return None
+        return self.materialize(row) if row is not None else None
+
+    def rows(self, category: Optional[str] = None) -> List[int]:
+        """
+        Filas vivas, opcionalmente filtradas por categoría (sin distinguir mayúsculas).
+        """
+        if not self.alive:
+            return []
+        mask = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+        if category is not None:
+            wanted = category.lower()
+            codes = [code for code, value in enumerate(self.categories.values) if value.lower() == wanted]
+            if not codes:
+                return []
+            mask &= np.isin(np.frombuffer(self.category_codes, dtype=np.int32), codes)
+        # Las vistas de numpy se liberan al salir para que los arreglos puedan seguir creciendo
+        return np.flatnonzero(mask).tolist()
+
+    def products(self, category: Optional[str] = None) -> List[ProductDetail]:
+        """
+        Args:
+            category: Categoría a filtrar (opcional)
+
+        Returns:
+            List[ProductDetail]: Productos vivos en orden de carga
+        """
+        return [self.materialize(row) for row in self.rows(category)]
+
+    def top(self, category: str, by: str, k: int) -> List[ProductDetail]:
+        """
+        Mejores productos de una categoría: los más baratos (by="price") o los mejor
+        calificados (by="rating", sin contar los que no tienen calificación).
+
+        Args:
+            category: Categoría (sin distinguir mayúsculas)
+            by: "price" o "rating"
+            k: Número de productos (hasta TOP_K_LIMIT)
+
+        Returns:
+            List[ProductDetail]: Productos en orden de ranking
+        """
+        key = (category.lower(), by)
+        ranking = self._top.get(key)
+        if ranking is None:
+            ranking = self._compute_top(category, by)
+            self._top[key] = ranking
+        return [self.materialize(row) for row in ranking[:k]]
+
+    def _top_rank(self, row: int, by: str) -> Optional[Tuple[float, int]]:
+        if by == "price":
+            return self.prices[row], row
+        rating = self.ratings[row]
+        return None if math.isnan(rating) else (-rating, row)
+
+    def _compute_top(self, category: str, by: str) -> List[int]:
+        rows = np.array(self.rows(category), dtype=np.int64)
+        if not len(rows):
+            return []
+        if by == "price":
+            values = np.frombuffer(self.prices, dtype=np.float64)[rows]
+        else:
+            values = -np.frombuffer(self.ratings, dtype=np.float64)[rows]
+            rated = ~np.isnan(values)
+            rows, values = rows[rated], values[rated]
+        if len(rows) > TOP_K_LIMIT:
+            best = np.argpartition(values, TOP_K_LIMIT - 1)[:TOP_K_LIMIT]
+            rows, values = rows[best], values[best]
+        return rows[np.lexsort((rows, values))].tolist()
+
+    def _top_category(self, row: int) -> str:
+        return self.categories.values[self.category_codes[row]].lower()
+
+    def _top_added(self, row: int, fields: Tuple[str, ...] = TOP_K_FIELDS):
+        for by in fields:
+            ranking = self._top.get((self._top_category(row), by))
+            rank = self._top_rank(row, by)
+            if ranking is None or rank is None:
+                continue
+            if len(ranking) < TOP_K_LIMIT or rank < self._top_rank(ranking[-1], by):
+                insort(ranking, row, key=lambda candidate: self._top_rank(candidate, by))
+                del ranking[TOP_K_LIMIT:]
+
+    def _top_removed(self, row: int, fields: Tuple[str, ...] = TOP_K_FIELDS):
+        for by in fields:
+            key = (self._top_category(row), by)
+            ranking = self._top.get(key)
+            if ranking is None or row not in ranking:
+                continue
+            if len(ranking) < TOP_K_LIMIT:
+                # Un ranking incompleto contiene toda la categoría: basta con quitar la fila
+                ranking.remove(row)
+            else:
+                del self._top[key]
+
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: Bytes ocupados por las columnas (sin contar las tablas de valores internados)
+        """
+        typed = (self.prices, self.ratings, self.versions, self.brand_codes, self.category_codes, self.spec_offsets, self.spec_keys)
+        return (
+            len(self.ids) + len(self.alive)
+            + sum(column.itemsize * len(column) for column in typed)
+            + self.names.nbytes() + self.descriptions.nbytes() + self.image_urls.nbytes() + self.spec_values.nbytes()
+        )
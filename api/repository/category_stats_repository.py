@@ -0,0 +1,393 @@
+import argparse
+import math
+import sys
+from typing import Iterable, List, Optional, Tuple
+from loguru import logger
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, ReturnDocument
+from pymongo.collation import Collation
+from config.database import get_collection
+from models.product import BrandCount, CategoryStats
+
+
+STATS_COLLECTION = "category_stats"
+TOP_BRANDS_LIMIT = 5
+
+# Las categorías se agrupan sin distinguir mayúsculas, igual que el filtro por categoría
+CATEGORY_COLLATION = Collation(locale="en", strength=2)
+
+_indexes_ready = False
+
+
+# $toLower de MongoDB solo cambia letras ASCII; las claves se calculan igual en Python
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _ascii_lower(value: str) -> str:
+    return value.translate(_ASCII_LOWER)
+
+
+def _stats_key(category: str) -> str:
+    return _ascii_lower(category)
+
+
+def _brand_field(brand: str) -> str:
+    # "." y "$" no pueden formar parte de una ruta de actualización en MongoDB
+    return brand.replace(".", "．").replace("$", "＄")
+
+
+def _brand_name(field: str) -> str:
+    return field.replace("．", ".").replace("＄", "$")
+
+
+def _brand_key(brand: Optional[str]) -> str:
+    # Las marcas se cuentan sin distinguir mayúsculas en todos los caminos: la
+    # agregación con CATEGORY_COLLATION agrupa "Apple" y "apple" juntas
+    return _brand_field(_ascii_lower(brand or ""))
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def ensure_category_indexes(products_collection=None):
+    """
+    Crea los índices (category, price) y (category, rating desc) sin distinción de
+    mayúsculas, usados para los mínimos y máximos de precio por categoría y para
+    los rankings por categoría.
+
+    Args:
+        products_collection: Colección de productos (opcional)
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+
+    collection = products_collection if products_collection is not None else get_collection("products")
+    collection.create_index(
+        [("category", ASCENDING), ("price", ASCENDING)],
+        name="category_price_ci",
+        collation=CATEGORY_COLLATION
+    )
+    collection.create_index(
+        [("category", ASCENDING), ("rating", DESCENDING)],
+        name="category_rating_ci",
+        collation=CATEGORY_COLLATION
+    )
+    _indexes_ready = True
+
+
+def _contribution(product: dict, sign: int) -> dict:
+    inc = {"product_count": sign, "price_sum": sign * product["price"]}
+    if _is_number(product.get("rating")):
+        inc["rating_sum"] = sign * product["rating"]
+        inc["rating_count"] = sign
+    inc[f"brands.{_brand_key(product.get('brand'))}"] = sign
+    return inc
+
+
+def record_product_added(products_collection, product: dict):
+    """
+    Suma la contribución de un producto a las estadísticas de su categoría.
+
+    Args:
+        products_collection: Colección de productos (se reutiliza su cliente)
+        product: Documento del producto
+    """
+    stats = products_collection.database[STATS_COLLECTION]
+    stats.update_one(
+        {"_id": _stats_key(product["category"])},
+        {
+            "$inc": _contribution(product, 1),
+            "$min": {"price_min": product["price"]},
+            "$max": {"price_max": product["price"]},
+            "$set": {f"brand_names.{_brand_key(product.get('brand'))}": product.get("brand") or ""},
+            "$setOnInsert": {"category": product["category"]}
+        },
+        upsert=True
+    )
+
+
+def record_product_removed(products_collection, product: dict):
+    """
+    Resta la contribución de un producto a las estadísticas de su categoría.
+
+    Si el producto era el mínimo o el máximo de precio, los límites se recalculan
+    con dos consultas respaldadas por el índice (category, price).
+
+    Args:
+        products_collection: Colección de productos (se reutiliza su cliente)
+        product: Documento del producto tal como estaba antes de la escritura
+    """
+    stats = products_collection.database[STATS_COLLECTION]
+    key = _stats_key(product["category"])
+
+    updated = stats.find_one_and_update(
+        {"_id": key},
+        {"$inc": _contribution(product, -1)},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        return
+
+    if updated["product_count"] <= 0:
+        stats.delete_one({"_id": key, "product_count": {"$lte": 0}})
+        return
+
+    if product["price"] <= updated.get("price_min", math.inf) or product["price"] >= updated.get("price_max", -math.inf):
+        _refresh_price_bounds(products_collection, key, product["category"])
+
+
+def record_product_replaced(products_collection, before: dict, after: dict):
+    """
+    Actualiza las estadísticas cuando un producto cambia de precio, calificación,
+    marca o categoría.
+
+    Args:
+        products_collection: Colección de productos (se reutiliza su cliente)
+        before: Documento anterior a la escritura
+        after: Documento posterior a la escritura
+    """
+    record_product_removed(products_collection, before)
+    record_product_added(products_collection, after)
+
+
+def record_prices_changed(products_collection, changes: Iterable[Tuple[dict, float]]):
+    """
+    Aplica cambios de precio masivos con un $inc por categoría, sin recorrer las
+    categorías completas. El mínimo y el máximo solo se recalculan (con el índice
+    (category, price)) en las categorías donde un precio anterior era uno de ellos.
+
+    Args:
+        products_collection: Colección de productos (se reutiliza su cliente)
+        changes: Pares (documento anterior con category y price, precio nuevo)
+    """
+    stats = products_collection.database[STATS_COLLECTION]
+
+    by_key = {}
+    for product, new_price in changes:
+        if product["price"] == new_price:
+            continue
+        change = by_key.setdefault(_stats_key(product["category"]), {
+            "category": product["category"],
+            "price_sum": 0.0,
+            "new_min": math.inf,
+            "new_max": -math.inf,
+            "old_min": math.inf,
+            "old_max": -math.inf
+        })
+        change["price_sum"] += new_price - product["price"]
+        change["new_min"] = min(change["new_min"], new_price)
+        change["new_max"] = max(change["new_max"], new_price)
+        change["old_min"] = min(change["old_min"], product["price"])
+        change["old_max"] = max(change["old_max"], product["price"])
+
+    for key, change in by_key.items():
+        previous = stats.find_one_and_update(
+            {"_id": key},
+            {
+                "$inc": {"price_sum": change["price_sum"]},
+                "$min": {"price_min": change["new_min"]},
+                "$max": {"price_max": change["new_max"]}
+            },
+            return_document=ReturnDocument.BEFORE
+        )
+        if not previous:
+            continue
+        if change["old_min"] <= previous.get("price_min", -math.inf) or change["old_max"] >= previous.get("price_max", math.inf):
+            _refresh_price_bounds(products_collection, key, change["category"])
+
+
+def _refresh_price_bounds(products_collection, key: str, category: str):
+    ensure_category_indexes(products_collection)
+
+    query = {"category": category}
+    cheapest = products_collection.find_one(
+        query, {"price": 1}, sort=[("price", ASCENDING)], collation=CATEGORY_COLLATION
+    )
+    priciest = products_collection.find_one(
+        query, {"price": 1}, sort=[("price", DESCENDING)], collation=CATEGORY_COLLATION
+    )
+    if not cheapest or not priciest:
+        return
+
+    products_collection.database[STATS_COLLECTION].update_one(
+        {"_id": key},
+        {"$set": {"price_min": cheapest["price"], "price_max": priciest["price"]}}
+    )
+
+
+# Equivalente en la agregación de _brand_field sobre la marca ya en minúsculas
+_BRAND_FIELD_EXPRESSION = {"$replaceAll": {
+    "input": {"$replaceAll": {"input": "$_id.brand", "find": ".", "replacement": "．"}},
+    "find": "$",
+    "replacement": "＄"
+}}
+
+
+def _category_stats_pipeline(categories: Optional[Iterable[str]] = None) -> List[dict]:
+    pipeline = []
+    if categories is not None:
+        pipeline.append({"$match": {"category": {"$in": list(categories)}}})
+
+    pipeline.extend([
+        {"$group": {
+            "_id": {"category": {"$toLower": "$category"}, "brand": {"$toLower": {"$ifNull": ["$brand", ""]}}},
+            "category": {"$first": "$category"},
+            "brand": {"$first": {"$ifNull": ["$brand", ""]}},
+            "product_count": {"$sum": 1},
+            "price_sum": {"$sum": "$price"},
+            "price_min": {"$min": "$price"},
+            "price_max": {"$max": "$price"},
+            "rating_sum": {"$sum": "$rating"},
+            "rating_count": {"$sum": {"$cond": [{"$isNumber": "$rating"}, 1, 0]}}
+        }},
+        {"$group": {
+            "_id": "$_id.category",
+            "category": {"$first": "$category"},
+            "product_count": {"$sum": "$product_count"},
+            "price_sum": {"$sum": "$price_sum"},
+            "price_min": {"$min": "$price_min"},
+            "price_max": {"$max": "$price_max"},
+            "rating_sum": {"$sum": "$rating_sum"},
+            "rating_count": {"$sum": "$rating_count"},
+            "brands": {"$push": {"k": _BRAND_FIELD_EXPRESSION, "v": "$product_count"}},
+            "brand_names": {"$push": {"k": _BRAND_FIELD_EXPRESSION, "v": "$brand"}}
+        }},
+        {"$set": {"brands": {"$arrayToObject": "$brands"}, "brand_names": {"$arrayToObject": "$brand_names"}}}
+    ])
+    return pipeline
+
+
+def refresh_category_stats(products_collection, categories: Iterable[str]):
+    """
+    Recalcula por completo las estadísticas de las categorías indicadas.
+
+    Se usa tras escrituras masivas, donde no se conocen los valores anteriores
+    de cada documento.
+
+    Args:
+        products_collection: Colección de productos (se reutiliza su cliente)
+        categories: Categorías a recalcular
+    """
+    categories = list(categories)
+    if not categories:
+        return
+
+    stats = products_collection.database[STATS_COLLECTION]
+
+    results = list(products_collection.aggregate(_category_stats_pipeline(categories), collation=CATEGORY_COLLATION))
+    operations = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in results]
+
+    found = {doc["_id"] for doc in results}
+    missing = [_stats_key(category) for category in categories if _stats_key(category) not in found]
+
+    if operations:
+        stats.bulk_write(operations, ordered=False)
+    if missing:
+        stats.delete_many({"_id": {"$in": missing}})
+
+
+def get_category_stats(category: str) -> Optional[CategoryStats]:
+    """
+    Obtiene las estadísticas materializadas de una categoría con una lectura por clave.
+
+    Args:
+        category: Nombre de la categoría (sin distinguir mayúsculas)
+
+    Returns:
+        Optional[CategoryStats]: Estadísticas de la categoría o None si no tiene productos
+    """
+    try:
+        stats = get_collection(STATS_COLLECTION)
+        document = stats.find_one({"_id": _stats_key(category)})
+        if document is None and not category.isascii():
+            # "óptica" y "Óptica" tienen claves distintas: se comparan con la collation de las categorías
+            document = stats.find_one({"_id": category}, collation=CATEGORY_COLLATION)
+
+        if not document or document.get("product_count", 0) <= 0:
+            return None
+
+        return _to_category_stats(document)
+    except Exception as e:
+        raise Exception(f"Error al obtener estadísticas de la categoría {category}: {str(e)}")
+
+
+def _to_category_stats(document: dict) -> CategoryStats:
+    product_count = document["product_count"]
+    rating_count = document.get("rating_count", 0)
+
+    names = document.get("brand_names") or {}
+    brands = sorted(
+        ((count, names.get(field) or _brand_name(field)) for field, count in (document.get("brands") or {}).items() if count > 0),
+        key=lambda item: (-item[0], item[1])
+    )
+
+    return CategoryStats(
+        category=document.get("category", document["_id"]),
+        product_count=product_count,
+        min_price=document["price_min"],
+        max_price=document["price_max"],
+        avg_price=round(document["price_sum"] / product_count, 2),
+        avg_rating=round(document["rating_sum"] / rating_count, 2) if rating_count > 0 else None,
+        top_brands=[BrandCount(brand=brand, count=count) for count, brand in brands[:TOP_BRANDS_LIMIT]]
+    )
+
+
+def rebuild_category_stats(check_only: bool = False) -> List[str]:
+    """
+    Recalcula toda la tabla category_stats con una sola agregación.
+
+    Args:
+        check_only: Si es True solo compara con la tabla actual sin reemplazarla
+
+    Returns:
+        List[str]: Categorías cuyas estadísticas materializadas no coincidían
+    """
+    collection = get_collection("products")
+    ensure_category_indexes(collection)
+    stats = collection.database[STATS_COLLECTION]
+
+    expected = {doc["_id"]: doc for doc in collection.aggregate(_category_stats_pipeline())}
+    current = {doc["_id"]: doc for doc in stats.find()}
+
+    mismatches = sorted(
+        key for key in set(expected) | set(current)
+        if key not in expected or key not in current or not _stats_match(expected[key], current[key])
+    )
+
+    if not check_only:
+        collection.aggregate(_category_stats_pipeline() + [{"$out": STATS_COLLECTION}])
+
+    return mismatches
+
+
+def _stats_match(expected: dict, current: dict) -> bool:
+    for field in ("product_count", "rating_count", "price_min", "price_max"):
+        if expected.get(field) != current.get(field):
+            return False
+    for field in ("price_sum", "rating_sum"):
+        if not math.isclose(expected.get(field, 0), current.get(field, 0), rel_tol=1e-9, abs_tol=1e-6):
+            return False
+    current_brands = {brand: count for brand, count in (current.get("brands") or {}).items() if count > 0}
+    return expected.get("brands", {}) == current_brands
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recalcula las estadísticas materializadas por categoría.")
+    parser.add_argument("--check", action="store_true", help="Solo verificar la consistencia, sin reescribir la tabla")
+    args = parser.parse_args(argv)
+
+    mismatches = rebuild_category_stats(check_only=args.check)
+
+    if mismatches:
+        logger.warning(f"Categorías inconsistentes: {', '.join(mismatches)}")
+    else:
+        logger.info("Estadísticas por categoría consistentes")
+    if not args.check:
+        logger.info("Tabla category_stats reconstruida")
+
+    return 1 if args.check and mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
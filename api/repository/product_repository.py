@@ -1,7 +1,211 @@
+import threading
+import time
+from collections import Counter
 from bson import ObjectId
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from config.core import settings
 from config.database import get_collection
 from models.product import ProductDetail
+from repository.catalog_store import TOP_K_LIMIT, CompactCatalog
+from repository.catalog_snapshot import SharedCatalogSnapshot
+from repository.category_stats_repository import (
+    CATEGORY_COLLATION,
+    ensure_category_indexes,
+    record_product_added,
+    record_product_removed,
+    record_product_replaced,
+    record_prices_changed,
+    refresh_category_stats
+)
+
+
+_STATS_FIELDS = ("price", "rating", "brand", "category")
+
+# Orden de cada ranking por categoría, cubierto por los índices de ensure_category_indexes
+_TOP_SORTS = {
+    "price": ("price", ASCENDING),
+    "rating": ("rating", DESCENDING)
+}
+
+
+def _sync_category_stats(operation, *args):
+    """
+    Aplica una actualización de estadísticas por categoría sin interrumpir la escritura
+    principal; las diferencias se corrigen con la reconstrucción de category_stats.
+    """
+    try:
+        operation(*args)
+    except Exception as e:
+        logger.warning(f"No se pudieron actualizar las estadísticas por categoría: {str(e)}")
+
+
+def load_catalog_documents():
+    """
+    Returns:
+        Cursor: Todos los productos ordenados por _id, para construir el catálogo compacto
+    """
+    return get_collection("products").find().sort("_id", ASCENDING)
+
+
+_memory_catalog: Optional[CompactCatalog] = None
+_memory_catalog_loaded_at = 0.0
+_memory_catalog_lock = threading.Lock()
+# Escrituras hechas mientras se recarga el catálogo; se reaplican sobre el nuevo antes del cambio
+_memory_catalog_pending: Optional[list] = None
+
+# Productos escritos por este proceso que el snapshot compartido todavía no incluye:
+# id -> (instante de la escritura en ns, producto o None si se eliminó)
+_snapshot_overlay: Dict[str, Tuple[int, Optional[ProductDetail]]] = {}
+_snapshot_overlay_lock = threading.Lock()
+_catalog_swap_listeners: List[Callable[[], None]] = []
+
+
+def _snapshot_swapped(metadata: dict):
+    """
+    Descarta del overlay las escrituras que ya incluye la versión publicada
+    (construida después de ellas) y notifica a los suscriptores.
+    """
+    with _snapshot_overlay_lock:
+        for product_id, (written_at_ns, _) in list(_snapshot_overlay.items()):
+            if metadata["built_at_ns"] > written_at_ns:
+                del _snapshot_overlay[product_id]
+    for listener in _catalog_swap_listeners:
+        listener()
+
+
+_shared_snapshot = SharedCatalogSnapshot(
+    settings.CATALOG_SNAPSHOT_PATH,
+    load_catalog_documents,
+    refresh_seconds=settings.CATALOG_REFRESH_SECONDS,
+    on_swap=_snapshot_swapped
+)
+
+
+def on_catalog_swapped(listener: Callable[[], None]):
+    """
+    Registra una función que se llama cada vez que el proceso empieza a usar una
+    versión nueva del snapshot compartido (por ejemplo, para invalidar cachés).
+    
+    Args:
+        listener: Función sin argumentos
+    """
+    _catalog_swap_listeners.append(listener)
+
+
+def _get_memory_catalog() -> CompactCatalog:
+    """
+    Obtiene el catálogo compacto en memoria. Solo la primera carga ocurre dentro
+    de la petición; al superar CATALOG_REFRESH_SECONDS (para incorporar escrituras
+    de otros procesos) se recarga en un hilo auxiliar y se reemplaza la referencia,
+    mientras se sigue sirviendo el catálogo anterior.
+    Con CATALOG_SHARED_SNAPSHOT el catálogo es el snapshot compartido entre workers.
+    
+    Returns:
+        CompactCatalog: Catálogo del proceso
+    """
+    global _memory_catalog, _memory_catalog_loaded_at
+    
+    if settings.CATALOG_SHARED_SNAPSHOT:
+        return _shared_snapshot.catalog()
+    
+    if _memory_catalog is None:
+        with _memory_catalog_lock:
+            if _memory_catalog is None:
+                _memory_catalog = CompactCatalog.from_documents(load_catalog_documents())
+                _memory_catalog_loaded_at = time.monotonic()
+    elif time.monotonic() - _memory_catalog_loaded_at >= settings.CATALOG_REFRESH_SECONDS:
+        _refresh_memory_catalog_in_background()
+    
+    return _memory_catalog
+
+
+def _refresh_memory_catalog_in_background():
+    global _memory_catalog_pending
+    
+    with _memory_catalog_lock:
+        if _memory_catalog_pending is not None:
+            return
+        _memory_catalog_pending = []
+    
+    def run():
+        global _memory_catalog, _memory_catalog_loaded_at, _memory_catalog_pending
+        try:
+            catalog = CompactCatalog.from_documents(load_catalog_documents())
+            with _memory_catalog_lock:
+                for operation, args in _memory_catalog_pending:
+                    getattr(catalog, operation)(*args)
+                _memory_catalog = catalog
+        except Exception as e:
+            logger.error(f"No se pudo recargar el catálogo en memoria: {str(e)}")
+        finally:
+            with _memory_catalog_lock:
+                # También tras un error, para no reintentar en cada petición
+                _memory_catalog_loaded_at = time.monotonic()
+                _memory_catalog_pending = None
+    
+    threading.Thread(target=run, name="catalog-refresh", daemon=True).start()
+
+
+def _apply_to_memory_catalog(operation: str, *args):
+    """
+    Aplica una escritura al catálogo en memoria del proceso (si está cargado) y la
+    registra para reaplicarla si hay una recarga en curso.
+    
+    Args:
+        operation: Método de CompactCatalog ("upsert", "remove" o "update_price")
+        args: Argumentos del método
+    """
+    args = tuple(dict(arg) if isinstance(arg, dict) else arg for arg in args)
+    with _memory_catalog_lock:
+        if _memory_catalog is None:
+            return
+        getattr(_memory_catalog, operation)(*args)
+        if _memory_catalog_pending is not None:
+            _memory_catalog_pending.append((operation, args))
+
+
+def mark_catalog_changed(written: Optional[Dict[str, Optional[ProductDetail]]] = None):
+    """
+    Marca el snapshot compartido como desactualizado después de una escritura, sin
+    interrumpirla si falla; en el peor caso se recarga al cumplirse CATALOG_REFRESH_SECONDS.
+    Los productos escritos se sirven desde un overlay del proceso hasta que se
+    publique un snapshot construido después de la escritura.
+    
+    Args:
+        written: Productos escritos por id (None para los eliminados)
+    """
+    if not settings.CATALOG_SHARED_SNAPSHOT:
+        return
+    if written:
+        written_at_ns = time.time_ns()
+        with _snapshot_overlay_lock:
+            for product_id, product in written.items():
+                _snapshot_overlay[product_id] = (written_at_ns, product)
+    try:
+        _shared_snapshot.mark_dirty()
+    except Exception as e:
+        logger.warning(f"No se pudo marcar el snapshot del catálogo como desactualizado: {str(e)}")
+
+
+def _overlay_products() -> Dict[str, Optional[ProductDetail]]:
+    if not settings.CATALOG_SHARED_SNAPSHOT:
+        return {}
+    with _snapshot_overlay_lock:
+        return {product_id: product for product_id, (_, product) in _snapshot_overlay.items()}
+
+
+def _with_overlay(products: List[ProductDetail], overlay: Dict[str, Optional[ProductDetail]]) -> List[ProductDetail]:
+    """
+    Reemplaza o quita los productos escritos por este proceso y agrega al final los creados.
+    """
+    if not overlay:
+        return products
+    merged = [overlay.get(product.id, product) for product in products]
+    known = {product.id for product in products}
+    merged += [product for product_id, product in overlay.items() if product_id not in known]
+    return [product for product in merged if product is not None]
 
 
 def get_products() -> List[ProductDetail]:
@@ -12,6 +216,10 @@ def get_products() -> List[ProductDetail]:
         List[ProductDetail]: Lista de productos
     """
     try:
+        if settings.CATALOG_MEMORY_MODE:
+            catalog = _get_memory_catalog()
+            return _with_overlay(catalog.products(), _overlay_products())
+        
         collection = get_collection("products")
         documents = list(collection.find())
         
@@ -38,6 +246,15 @@ def get_product_by_id(product_id: str) -> Optional[ProductDetail]:
         Optional[ProductDetail]: Producto encontrado o None si no existe
     """
     try:
+        if settings.CATALOG_MEMORY_MODE:
+            overlay = _overlay_products()
+            if product_id in overlay:
+                return overlay[product_id]
+            product = _get_memory_catalog().get(product_id)
+            if product is not None:
+                return product
+            # Puede haberlo creado otro proceso después de la última recarga
+        
         try:
             obj_id = ObjectId(product_id)
         except Exception:
@@ -58,6 +275,133 @@ def get_product_by_id(product_id: str) -> Optional[ProductDetail]:
         raise Exception(f"Error al obtener producto {product_id}: {str(e)}")
 
 
+def get_products_by_ids(product_ids: List[str]) -> List[ProductDetail]:
+    """
+    Obtiene varios productos con una sola consulta, conservando el orden de los IDs.
+    
+    Args:
+        product_ids: IDs de los productos (string)
+        
+    Returns:
+        List[ProductDetail]: Productos encontrados en el mismo orden solicitado
+    """
+    try:
+        if settings.CATALOG_MEMORY_MODE:
+            catalog = _get_memory_catalog()
+            overlay = _overlay_products()
+            by_id = {product.id: product for product in map(catalog.get, product_ids) if product}
+            by_id.update(overlay)
+            missing = [product_id for product_id in product_ids if product_id not in by_id]
+            if missing:
+                # Pueden haberlos creado otros procesos después de la última recarga
+                by_id.update({product.id: product for product in _find_products_by_ids(missing)})
+            return [by_id[product_id] for product_id in product_ids if by_id.get(product_id)]
+        
+        return _find_products_by_ids(product_ids)
+    except Exception as e:
+        raise Exception(f"Error al obtener productos de la base de datos: {str(e)}")
+
+
+def _find_products_by_ids(product_ids: List[str]) -> List[ProductDetail]:
+    obj_ids = []
+    for product_id in product_ids:
+        try:
+            obj_ids.append(ObjectId(product_id))
+        except Exception:
+            continue
+    
+    if not obj_ids:
+        return []
+    
+    collection = get_collection("products")
+    by_id = {}
+    for doc in collection.find({"_id": {"$in": obj_ids}}):
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        by_id[doc['id']] = ProductDetail(**doc)
+    
+    return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+
+def get_top_products(category: str, by: str, k: int) -> List[ProductDetail]:
+    """
+    Obtiene los k productos más baratos o mejor calificados de una categoría con una
+    consulta ordenada sobre índice, que examina solo k entradas.
+    
+    Args:
+        category: Nombre de la categoría (sin distinguir mayúsculas)
+        by: "price" (más baratos primero) o "rating" (mejor calificados primero)
+        k: Número de productos
+        
+    Returns:
+        List[ProductDetail]: Productos en orden de ranking
+    """
+    try:
+        if settings.CATALOG_MEMORY_MODE:
+            catalog = _get_memory_catalog()
+            overlay = _overlay_products()
+            if not overlay:
+                return catalog.top(category, by, k)
+            # Se piden candidatos de más por si el overlay saca productos del ranking
+            candidates = _with_overlay(catalog.top(category, by, min(k + len(overlay), TOP_K_LIMIT)), overlay)
+            field, direction = _TOP_SORTS[by]
+            ranked = [
+                product for product in candidates
+                if product.category.lower() == category.lower() and getattr(product, field) is not None
+            ]
+            ranked.sort(key=lambda product: (direction * getattr(product, field), product.id))
+            return ranked[:k]
+        
+        collection = get_collection("products")
+        ensure_category_indexes(collection)
+        
+        field, direction = _TOP_SORTS[by]
+        cursor = collection.find(
+            {"category": category, field: {"$type": "number"}},
+            sort=[(field, direction)],
+            limit=k,
+            collation=CATEGORY_COLLATION
+        )
+        
+        products = []
+        for doc in cursor:
+            doc['id'] = str(doc.pop('_id'))
+            products.append(ProductDetail(**doc))
+        
+        return products
+    except Exception as e:
+        raise Exception(f"Error al obtener el ranking de la categoría {category}: {str(e)}")
+
+
+def get_product_feature_sources(category: Optional[str] = None) -> List[dict]:
+    """
+    Obtiene solo los campos necesarios para construir vectores de características.
+    
+    Args:
+        category: Si se indica, solo los productos de esa categoría (sin distinguir mayúsculas)
+    
+    Returns:
+        List[dict]: Productos con id, category, brand, price, rating y specs
+    """
+    try:
+        collection = get_collection("products")
+        projection = {"category": 1, "brand": 1, "price": 1, "rating": 1, "specs": 1}
+        
+        if category is None:
+            cursor = collection.find({}, projection)
+        else:
+            cursor = collection.find({"category": category}, projection, collation=CATEGORY_COLLATION)
+        
+        documents = []
+        for doc in cursor:
+            doc['id'] = str(doc.pop('_id'))
+            documents.append(doc)
+        
+        return documents
+    except Exception as e:
+        raise Exception(f"Error al obtener productos de la base de datos: {str(e)}")
+
+
 def create_product(product_data: dict) -> ProductDetail:
     """
     Crea un nuevo producto en la base de datos.
@@ -71,18 +415,162 @@ def create_product(product_data: dict) -> ProductDetail:
     try:
         collection = get_collection("products")
         
+        product_data["version"] = 1
         result = collection.insert_one(product_data)
         created_product = collection.find_one({"_id": result.inserted_id})
+        _sync_category_stats(record_product_added, collection, created_product)
+        _apply_to_memory_catalog("upsert", created_product)
         
         created_product['id'] = str(created_product['_id'])
         del created_product['_id']
         
-        return ProductDetail(**created_product)
+        product = ProductDetail(**created_product)
+        mark_catalog_changed({product.id: product})
+        return product
         
     except Exception as e:
         raise Exception(f"Error al crear producto: {str(e)}")
 
 
+def update_product(product_id: str, update_data: dict) -> Optional[ProductDetail]:
+    """
+    Actualiza parcialmente un producto con un único $set atómico.
+    
+    Args:
+        product_id: ID del producto (string)
+        update_data: Campos a modificar
+        
+    Returns:
+        Optional[ProductDetail]: Producto actualizado o None si no existe
+    """
+    try:
+        try:
+            obj_id = ObjectId(product_id)
+        except Exception:
+            return None
+        
+        collection = get_collection("products")
+        previous = collection.find_one_and_update(
+            {"_id": obj_id},
+            {"$set": update_data, "$inc": {"version": 1}},
+            return_document=ReturnDocument.BEFORE
+        )
+        
+        if not previous:
+            return None
+        
+        document = {**previous, **update_data, "version": previous.get("version", 0) + 1}
+        if any(field in update_data for field in _STATS_FIELDS):
+            _sync_category_stats(record_product_replaced, collection, previous, document)
+        _apply_to_memory_catalog("upsert", document)
+        
+        document['id'] = str(document['_id'])
+        del document['_id']
+        
+        product = ProductDetail(**document)
+        mark_catalog_changed({product.id: product})
+        return product
+        
+    except Exception as e:
+        raise Exception(f"Error al actualizar producto {product_id}: {str(e)}")
+
+
+def delete_product(product_id: str) -> bool:
+    """
+    Elimina un producto por su ID.
+    
+    Args:
+        product_id: ID del producto (string)
+        
+    Returns:
+        bool: True si el producto fue eliminado, False si no existe
+    """
+    try:
+        try:
+            obj_id = ObjectId(product_id)
+        except Exception:
+            return False
+        
+        collection = get_collection("products")
+        deleted = collection.find_one_and_delete({"_id": obj_id})
+        
+        if not deleted:
+            return False
+        
+        _sync_category_stats(record_product_removed, collection, deleted)
+        _apply_to_memory_catalog("remove", product_id)
+        mark_catalog_changed({str(obj_id): None})
+        return True
+        
+    except Exception as e:
+        raise Exception(f"Error al eliminar producto {product_id}: {str(e)}")
+
+
+def bulk_update_prices(price_updates: List[dict]) -> dict:
+    """
+    Aplica múltiples cambios de precio en una sola llamada bulk_write.
+    
+    Args:
+        price_updates: Lista de diccionarios con "id" y "price"
+        
+    Returns:
+        dict: Conteo de documentos encontrados, modificados e IDs inválidos
+    """
+    operations = []
+    obj_ids = []
+    new_prices = {}
+    updates_per_id = Counter()
+    invalid_ids = []
+    
+    for item in price_updates:
+        try:
+            obj_id = ObjectId(item["id"])
+        except Exception:
+            invalid_ids.append(item["id"])
+            continue
+        obj_ids.append(obj_id)
+        new_prices[obj_id] = item["price"]
+        updates_per_id[obj_id] += 1
+        operations.append(
+            UpdateOne(
+                {"_id": obj_id},
+                {"$set": {"price": item["price"]}, "$inc": {"version": 1}}
+            )
+        )
+    
+    if not operations:
+        return {"matched_count": 0, "modified_count": 0, "invalid_ids": invalid_ids}
+    
+    try:
+        collection = get_collection("products")
+        previous = list(collection.find({"_id": {"$in": obj_ids}}, {"category": 1, "price": 1, "version": 1}))
+        result = collection.bulk_write(operations, ordered=False)
+        _sync_category_stats(
+            record_prices_changed,
+            collection,
+            [(document, new_prices[document["_id"]]) for document in previous]
+        )
+        for document in previous:
+            # Se fija la versión final (y no un +1) para que la repetición tras una recarga sea idempotente
+            _apply_to_memory_catalog(
+                "update_price",
+                str(document["_id"]),
+                new_prices[document["_id"]],
+                document.get("version", 0) + updates_per_id[document["_id"]]
+            )
+        if settings.CATALOG_SHARED_SNAPSHOT:
+            mark_catalog_changed({product.id: product for product in _find_products_by_ids([str(obj_id) for obj_id in obj_ids])})
+        
+        return {
+            "matched_count": result.matched_count,
+            "modified_count": result.modified_count,
+            "invalid_ids": invalid_ids
+        }
+        
+    except Exception as e:
+        raise Exception(f"Error al actualizar precios: {str(e)}")
+
+
 def create_sample_products():
     """
     Crea productos de ejemplo en la base de datos.
@@ -144,7 +632,11 @@ def create_sample_products():
     try:
         collection = get_collection("products")
         if collection.count_documents({}) == 0:
+            for product in sample_products:
+                product["version"] = 1
             collection.insert_many(sample_products)
+            _sync_category_stats(refresh_category_stats, collection, {p["category"] for p in sample_products})
+            mark_catalog_changed()
             print("Productos de ejemplo creados exitosamente")
     except Exception as e:
         print(f"Error al crear productos de ejemplo: {str(e)}")
@@ -0,0 +1,57 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, status
+from config.core import settings
+from config.database import slow_query_listener
+from middleware.response_cache import response_cache
+from models.admin import SlowQueryReport, ResponseCacheStats
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _require_admin_token(token: Optional[str]):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Endpoints de administración deshabilitados: configure ADMIN_TOKEN"
+        )
+    if not token or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de administración inválido"
+        )
+
+
+@router.get("/slow-queries", response_model=SlowQueryReport)
+async def get_slow_queries(x_admin_token: Optional[str] = Header(None)):
+    """
+    Obtiene las consultas lentas a MongoDB registradas recientemente por este proceso.
+    
+    Args:
+        x_admin_token: Token de administración (cabecera X-Admin-Token)
+        
+    Returns:
+        SlowQueryReport: Umbral configurado y consultas lentas, de la más nueva a la más antigua
+    """
+    _require_admin_token(x_admin_token)
+    
+    return SlowQueryReport(
+        threshold_ms=slow_query_listener.threshold_ms,
+        queries=slow_query_listener.recent_queries()
+    )
+
+
+@router.get("/response-cache", response_model=ResponseCacheStats)
+async def get_response_cache_stats(x_admin_token: Optional[str] = Header(None)):
+    """
+    Obtiene las métricas de aciertos y fallos de la caché de respuestas de este proceso.
+    
+    Args:
+        x_admin_token: Token de administración (cabecera X-Admin-Token)
+        
+    Returns:
+        ResponseCacheStats: Métricas de la caché
+    """
+    _require_admin_token(x_admin_token)
+    
+    return ResponseCacheStats(**response_cache.stats())
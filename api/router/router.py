@@ -1,16 +1,26 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Response, status
 from typing import List
 from models.product import (
     ProductDetail, 
     ProductCompareRequest,
     ProductCompareResponse,
-    ProductCreateRequest
+    ProductCreateRequest,
+    ProductUpdateRequest,
+    CategoryStats,
+    BulkPriceUpdateRequest,
+    BulkPriceUpdateResponse
 )
 from business_logic.product_logic import (
     list_products,
     get_product_details,
     compare_products,
-    create_product_logic
+    create_product_logic,
+    update_product_logic,
+    delete_product_logic,
+    bulk_update_prices_logic,
+    get_similar_products,
+    get_category_stats_logic,
+    get_top_products_logic
 )
 
 router = APIRouter(prefix="/api/products", tags=["products"])
@@ -76,6 +86,46 @@ async def get_product_by_id(product_id: str):
         )
 
 
+@router.get("/{product_id}/similar", response_model=List[ProductDetail])
+async def get_similar_products_endpoint(
+    product_id: str,
+    k: int = Query(5, ge=1, le=50, description="Número de productos similares a devolver")
+):
+    """
+    Sugiere productos similares de la misma categoría como candidatos para comparar.
+    
+    Args:
+        product_id: ID único del producto de referencia
+        k: Número de productos similares a devolver
+        
+    Returns:
+        List[ProductDetail]: Productos ordenados del más al menos similar
+    """
+    try:
+        similar_products = get_similar_products(product_id.strip(), k)
+        
+        if similar_products is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {product_id} no encontrado"
+            )
+        
+        return similar_products
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
 @router.post("/compare", response_model=ProductCompareResponse)
 async def compare_products_endpoint(compare_request: ProductCompareRequest):
     """
@@ -136,6 +186,74 @@ async def get_products_by_category(category: str):
         )
 
 
+@router.get("/category/{category}/stats", response_model=CategoryStats)
+async def get_category_stats_endpoint(category: str):
+    """
+    Obtiene el resumen materializado de una categoría (precios, calificación y marcas).
+    
+    Args:
+        category: Nombre de la categoría
+        
+    Returns:
+        CategoryStats: Estadísticas de la categoría
+    """
+    try:
+        stats = get_category_stats_logic(category)
+        
+        if not stats:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No hay productos en la categoría {category}"
+            )
+        
+        return stats
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
+@router.get("/category/{category}/top", response_model=List[ProductDetail])
+async def get_top_products_endpoint(
+    category: str,
+    by: str = Query("rating", description="Criterio del ranking: rating (mejor calificados) o price (más baratos)"),
+    k: int = Query(10, ge=1, le=50, description="Número de productos a devolver")
+):
+    """
+    Obtiene los productos mejor calificados o más baratos de una categoría.
+    
+    Args:
+        category: Nombre de la categoría
+        by: Criterio del ranking ("rating" o "price")
+        k: Número de productos a devolver
+        
+    Returns:
+        List[ProductDetail]: Productos en orden de ranking
+    """
+    try:
+        return get_top_products_logic(category, by, k)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
 @router.post("/", response_model=ProductDetail, status_code=status.HTTP_201_CREATED)
 async def create_product_endpoint(product_request: ProductCreateRequest):
     """
@@ -163,3 +281,104 @@ async def create_product_endpoint(product_request: ProductCreateRequest):
             detail=f"Error interno del servidor: {str(e)}"
         )
 
+
+@router.patch("/{product_id}", response_model=ProductDetail)
+async def update_product_endpoint(product_id: str, product_request: ProductUpdateRequest):
+    """
+    Actualiza parcialmente un producto existente.
+    
+    Args:
+        product_id: ID único del producto
+        product_request: Campos a modificar (solo se aplican los enviados)
+        
+    Returns:
+        ProductDetail: Producto actualizado con su nueva versión
+    """
+    try:
+        update_data = product_request.dict(exclude_unset=True, exclude_none=True)
+        updated_product = update_product_logic(product_id.strip(), update_data)
+        
+        if not updated_product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {product_id} no encontrado"
+            )
+        
+        return updated_product
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
+@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_product_endpoint(product_id: str):
+    """
+    Elimina un producto del sistema.
+    
+    Args:
+        product_id: ID único del producto
+        
+    Returns:
+        Response: Respuesta vacía con código 204
+    """
+    try:
+        deleted = delete_product_logic(product_id.strip())
+        
+        if not deleted:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {product_id} no encontrado"
+            )
+        
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
+@router.post("/prices:bulk", response_model=BulkPriceUpdateResponse)
+async def bulk_update_prices_endpoint(bulk_request: BulkPriceUpdateRequest):
+    """
+    Actualiza el precio de múltiples productos en una sola operación bulk_write.
+    
+    Args:
+        bulk_request: Lista de cambios de precio (id y nuevo precio)
+        
+    Returns:
+        BulkPriceUpdateResponse: Conteo de productos encontrados y modificados
+    """
+    try:
+        price_updates = [item.dict() for item in bulk_request.updates]
+        result = bulk_update_prices_logic(price_updates)
+        return result
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
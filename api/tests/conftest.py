@@ -7,9 +7,11 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from main import app
+from middleware.response_cache import response_cache
 
 
 @pytest.fixture
 def client():
     """Cliente de prueba para FastAPI."""
+    response_cache.clear()
     return TestClient(app)
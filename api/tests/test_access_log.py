@@ -0,0 +1,108 @@
+import time
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from loguru import logger
+
+from config.logging_config import _add_request_id
+from middleware.access_log import install_access_log
+
+
+def _build_client(sample_rate, slow_ms=500.0):
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        logger.info("dentro del endpoint")
+        return {"status": "ok"}
+
+    @app.get("/missing")
+    async def missing():
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+    @app.get("/slow")
+    async def slow():
+        time.sleep(0.02)
+        return {"status": "ok"}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("falla")
+
+    install_access_log(app, sample_rate=sample_rate, slow_ms=slow_ms)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.fixture
+def records():
+    """Registros emitidos por loguru durante la prueba."""
+    logger.configure(patcher=_add_request_id)
+    captured = []
+    sink_id = logger.add(lambda message: captured.append(message.record), level="INFO")
+    yield captured
+    logger.remove(sink_id)
+
+
+def _access_records(records):
+    return [record for record in records if "status" in record["extra"]]
+
+
+def test_request_id_is_propagated(records):
+    """El request id recibido se devuelve en la respuesta y se agrega a los logs de la petición."""
+    client = _build_client(sample_rate=0)
+
+    response = client.get("/ok", headers={"X-Request-ID": "abc-123"})
+
+    assert response.headers["X-Request-ID"] == "abc-123"
+    endpoint_log = next(record for record in records if record["message"] == "dentro del endpoint")
+    assert endpoint_log["extra"]["request_id"] == "abc-123"
+
+
+def test_request_id_is_generated():
+    """Sin cabecera se genera un request id distinto por petición."""
+    client = _build_client(sample_rate=0)
+
+    first = client.get("/ok").headers["X-Request-ID"]
+    second = client.get("/ok").headers["X-Request-ID"]
+
+    assert first and second and first != second
+
+
+def test_successful_requests_are_sampled(records):
+    """Las peticiones exitosas solo se registran según la tasa de muestreo."""
+    _build_client(sample_rate=0).get("/ok")
+    assert _access_records(records) == []
+
+    _build_client(sample_rate=1.0).get("/ok?page=2")
+    access = _access_records(records)
+    assert len(access) == 1
+    assert access[0]["level"].name == "INFO"
+    assert access[0]["extra"]["sampled"] is True
+    assert access[0]["extra"]["query"] == "page=2"
+    assert access[0]["extra"]["latency_ms"] >= 0
+
+
+def test_errors_and_slow_requests_are_always_logged(records):
+    """Los errores y las peticiones lentas se registran aunque el muestreo esté desactivado."""
+    client = _build_client(sample_rate=0, slow_ms=10)
+
+    assert client.get("/missing").status_code == 404
+    assert client.get("/slow").status_code == 200
+    assert client.get("/boom").status_code == 500
+
+    access = _access_records(records)
+    assert [(record["extra"]["path"], record["extra"]["status"], record["level"].name) for record in access] == [
+        ("/missing", 404, "WARNING"),
+        ("/slow", 200, "WARNING"),
+        ("/boom", 500, "ERROR")
+    ]
+    assert all(record["extra"]["sampled"] is False for record in access)
+
+
+def test_sensitive_query_params_are_redacted(records):
+    """El token de perfilado y otros secretos no llegan al log de acceso."""
+    _build_client(sample_rate=1.0).get("/ok?page=2&profile_token=secreto&API_KEY=otro")
+
+    query = _access_records(records)[0]["extra"]["query"]
+    assert "secreto" not in query and "otro" not in query
+    assert query == "page=2&profile_token=***&API_KEY=***"
@@ -0,0 +1,78 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from repository.catalog_import import import_catalog, read_rows, validate_chunk
+
+
+def _write_csv(path, rows):
+    lines = ["sku,name,brand,price,category,rating,specs.ram"]
+    lines += [",".join(str(value) for value in row) for row in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_validate_chunk_normalizes_rows():
+    """Las filas CSV y JSONL se validan contra ProductCreateRequest."""
+    chunk = [
+        (1, {"sku": "A1", "name": "Galaxy", "brand": "Samsung", "price": "999.99",
+             "category": "Smartphones", "rating": "", "specs.ram": "8GB"}),
+        (2, json.dumps({"sku": "A2", "name": "Pixel", "brand": "Google", "price": 899.99,
+                        "category": "Smartphones", "specs": {"ram": 8}})),
+        (3, {"sku": "A3", "name": "", "brand": "X", "price": "-1", "category": "Otros"}),
+        (4, {"sku": "", "name": "Sin SKU", "brand": "X", "price": "1", "category": "Otros"})
+    ]
+    
+    documents, errors = validate_chunk(chunk, "sku")
+    
+    assert [document["sku"] for document in documents] == ["A1", "A2"]
+    assert documents[0]["price"] == 999.99
+    assert documents[0]["rating"] is None
+    assert documents[1]["specs"] == {"ram": "8"}
+    assert [number for number, _ in errors] == [3, 4]
+
+
+def test_malformed_rows_are_reported(tmp_path):
+    """Una fila CSV con campos de más o una línea JSONL que no es un objeto se registran como error."""
+    source = tmp_path / "feed.csv"
+    _write_csv(source, [("S0", "Prod 0", "Marca", 10, "Cat", 4.5, "8GB"), ("S1", "Prod 1", "Marca", 11, "Cat", 4.5, "8GB", "sobra")])
+    chunk = list(read_rows(str(source), "csv"))
+    chunk += [(3, "[1, 2]"), (4, json.dumps({"sku": "A4", "name": "X", "brand": "X", "price": 1, "category": "Otros", "specs": [1]}))]
+    
+    documents, errors = validate_chunk(chunk, "sku")
+    
+    assert [document["sku"] for document in documents] == ["S0"]
+    assert [number for number, _ in errors] == [2, 3, 4]
+    assert "campos más que el encabezado" in errors[0][1]
+
+
+def test_import_catalog_upserts_by_sku(tmp_path):
+    """La importación escribe en bloques con upserts por SKU y elimina el checkpoint al terminar."""
+    source = tmp_path / "feed.csv"
+    _write_csv(source, [(f"S{i}", f"Prod {i}", "Marca", 10 + i, "Cat", 4.5, "8GB") for i in range(5)])
+    collection = MagicMock()
+    collection.bulk_write.return_value = MagicMock(inserted_count=0, upserted_count=2, modified_count=0)
+    
+    totals = import_catalog(str(source), sku_field="sku", chunk_size=2, collection=collection)
+    
+    assert collection.bulk_write.call_count == 3
+    operations = collection.bulk_write.call_args_list[0].args[0]
+    assert operations[0]._filter == {"sku": "S0"}
+    assert totals["rows"] == 5
+    assert not (tmp_path / "feed.csv.checkpoint.json").exists()
+
+
+def test_import_catalog_resumes_from_checkpoint(tmp_path):
+    """Con --resume se omiten las filas registradas en el checkpoint."""
+    source = tmp_path / "feed.csv"
+    _write_csv(source, [(f"S{i}", f"Prod {i}", "Marca", 10 + i, "Cat", 4.5, "8GB") for i in range(5)])
+    checkpoint = tmp_path / "feed.checkpoint.json"
+    checkpoint.write_text(json.dumps({"source": str(source.resolve()), "rows_done": 3}), encoding="utf-8")
+    collection = MagicMock()
+    collection.bulk_write.return_value = MagicMock(inserted_count=2, upserted_count=0, modified_count=0)
+    
+    totals = import_catalog(str(source), checkpoint_path=str(checkpoint), resume=True, collection=collection)
+    
+    written = collection.bulk_write.call_args.args[0]
+    assert [operation._doc["name"] for operation in written] == ["Prod 3", "Prod 4"]
+    assert totals["inserted"] == 2
+    assert [number for number, _ in read_rows(str(source), "csv", skip=4)] == [5]
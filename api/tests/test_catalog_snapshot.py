@@ -0,0 +1,162 @@
+import io
+import json
+import multiprocessing
+import os
+import time
+from functools import partial
+from unittest.mock import MagicMock, patch
+
+import pytest
+from bson import ObjectId
+
+from business_logic import product_logic
+from config.core import settings
+from middleware.response_cache import response_cache
+from models.product import ProductDetail
+from repository import product_repository
+from repository.catalog_snapshot import SharedCatalogSnapshot
+from repository.catalog_store import CompactCatalog
+
+
+def _document(name, category="Smartphones", price=999.99, **extra):
+    return {
+        "_id": str(ObjectId()),
+        "name": name,
+        "brand": "Samsung",
+        "price": price,
+        "category": category,
+        "rating": 4.5,
+        "description": None,
+        "image_url": "https://example.com/p.jpg",
+        "specs": {"ram": "8GB"},
+        "version": 1,
+        **extra
+    }
+
+
+def _load_from_file(source_path, counter_path):
+    """Cargador de documentos que registra cuántas veces se construyó el catálogo."""
+    with open(counter_path, "a") as counter:
+        counter.write(f"{os.getpid()}\n")
+    with open(source_path) as source:
+        documents = [json.loads(line) for line in source]
+    return sorted(documents, key=lambda document: document["_id"])
+
+
+def _read_in_worker(snapshot_path, source_path, counter_path, product_id):
+    snapshot = SharedCatalogSnapshot(snapshot_path, partial(_load_from_file, source_path, counter_path))
+    catalog = snapshot.catalog()
+    return snapshot.version, len(catalog), catalog.get(product_id).name
+
+
+@pytest.fixture
+def catalog_files(tmp_path):
+    """Archivo de documentos, contador de construcciones y ruta del snapshot."""
+    documents = [_document(f"Producto {index}", category="Laptops" if index % 2 else "Smartphones") for index in range(50)]
+    source_path = tmp_path / "products.jsonl"
+    source_path.write_text("".join(json.dumps(document) + "\n" for document in documents))
+    return documents, str(source_path), str(tmp_path / "builds.txt"), str(tmp_path / "catalog.snap")
+
+
+def _builds(counter_path):
+    with open(counter_path) as counter:
+        return len(counter.readlines())
+
+
+def test_snapshot_round_trip_without_copies():
+    """El catálogo abierto desde un snapshot lee las columnas directamente del buffer."""
+    documents = [_document("Galaxy S23"), _document("MacBook Air", category="Laptops", price=1499.99)]
+    catalog = CompactCatalog.from_documents(sorted(documents, key=lambda document: document["_id"]))
+    file = io.BytesIO()
+    catalog.dump(file, version=3)
+
+    restored, metadata = CompactCatalog.from_buffer(file.getbuffer())
+
+    assert metadata["version"] == 3
+    assert isinstance(restored.prices, memoryview)
+    assert restored.products() == catalog.products()
+    assert [product.name for product in restored.products("laptops")] == ["MacBook Air"]
+    assert restored.get(documents[0]["_id"]).specs == {"ram": "8GB"}
+    assert restored.get(str(ObjectId())) is None
+
+
+def test_snapshot_is_compacted():
+    """Las filas eliminadas o reemplazadas no se serializan y el resultado queda ordenado por _id."""
+    first, second = _document("Galaxy S23"), _document("Pixel 8")
+    catalog = CompactCatalog.from_documents([first, second])
+    catalog.remove(second["_id"])
+    catalog.upsert({**first, "price": 899.99})
+    file = io.BytesIO()
+    catalog.dump(file)
+
+    restored, metadata = CompactCatalog.from_buffer(file.getbuffer())
+
+    assert metadata["rows"] == 1
+    assert len(restored.alive) == 1
+    assert restored.get(first["_id"]).price == 899.99
+
+
+def test_workers_share_a_single_build(catalog_files):
+    """Varios procesos leen el mismo snapshot y solo uno lo construye."""
+    documents, source_path, counter_path, snapshot_path = catalog_files
+    product = documents[7]
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(4) as pool:
+        results = pool.starmap(_read_in_worker, [(snapshot_path, source_path, counter_path, product["_id"])] * 8)
+
+    assert set(results) == {(1, 50, product["name"])}
+    assert _builds(counter_path) == 1
+
+
+def test_dirty_snapshot_is_republished_and_swapped(catalog_files):
+    """Una escritura marcada con mark_dirty publica una versión nueva que ven todos los procesos."""
+    documents, source_path, counter_path, snapshot_path = catalog_files
+    loader = partial(_load_from_file, source_path, counter_path)
+    swaps = []
+    writer = SharedCatalogSnapshot(snapshot_path, loader, check_interval=0)
+    reader = SharedCatalogSnapshot(snapshot_path, loader, check_interval=0, on_swap=swaps.append)
+    old_catalog = reader.catalog()
+
+    changed = {**documents[0], "name": "Renombrado"}
+    with open(source_path, "a") as source:
+        source.write(json.dumps(changed) + "\n")
+    writer.mark_dirty()
+
+    assert writer.refresh()
+    assert not writer.refresh()
+    assert reader.catalog().get(documents[0]["_id"]).name == "Renombrado"
+    assert reader.version == 2
+    assert [metadata["version"] for metadata in swaps] == [1, 2]
+    assert _builds(counter_path) == 2
+    # Las lecturas en curso siguen usando el mapeo anterior
+    assert old_catalog.get(documents[0]["_id"]).name == documents[0]["name"]
+
+
+def test_own_writes_are_visible_before_the_rebuild():
+    """En modo compartido, el proceso que escribe ve su escritura hasta que un snapshot posterior la incluye."""
+    first, second = _document("Galaxy S23", price=999.99), _document("Pixel 8", category="Smartphones", price=699.99)
+    snapshot = MagicMock()
+    snapshot.catalog.return_value = CompactCatalog.from_documents(sorted([first, second], key=lambda document: document["_id"]))
+    updated = ProductDetail(**{**first, "id": first["_id"], "price": 499.99, "version": 2})
+    created = ProductDetail(**{**second, "id": str(ObjectId()), "name": "iPhone 15", "price": 599.99})
+
+    with patch.object(settings, "CATALOG_MEMORY_MODE", True), \
+         patch.object(settings, "CATALOG_SHARED_SNAPSHOT", True), \
+         patch.object(product_repository, "_shared_snapshot", snapshot), \
+         patch.object(product_repository, "_snapshot_overlay", {}):
+        product_repository.mark_catalog_changed({updated.id: updated, created.id: created, second["_id"]: None})
+        snapshot.mark_dirty.assert_called_once()
+
+        assert product_repository.get_product_by_id(first["_id"]).price == 499.99
+        assert product_repository.get_product_by_id(second["_id"]) is None
+        assert [product.name for product in product_repository.get_products()] == ["Galaxy S23", "iPhone 15"]
+        assert [product.name for product in product_repository.get_top_products("smartphones", "price", 1)] == ["Galaxy S23"]
+
+        invalidations = response_cache.stats()["invalidations"]
+        product_repository._snapshot_swapped({"version": 2, "built_at_ns": 0})
+        assert len(product_repository._snapshot_overlay) == 3
+        product_repository._snapshot_swapped({"version": 3, "built_at_ns": time.time_ns()})
+        assert product_repository._snapshot_overlay == {}
+        # product_logic invalida la caché de respuestas en cada cambio de versión
+        assert response_cache.stats()["invalidations"] == invalidations + 2
@@ -0,0 +1,192 @@
+import random
+import threading
+import time
+import pytest
+from bson import ObjectId
+from unittest.mock import MagicMock, patch
+
+from config.core import settings
+from repository import product_repository
+from repository.catalog_store import TOP_K_FIELDS, TOP_K_LIMIT, CompactCatalog
+
+
+def _document(name, category="Smartphones", price=999.99, rating=4.5, **extra):
+    return {
+        "_id": ObjectId(),
+        "name": name,
+        "brand": "Samsung",
+        "price": price,
+        "category": category,
+        "rating": rating,
+        "description": f"Descripción de {name}",
+        "image_url": None,
+        "specs": {"ram": "8GB", "storage": "128GB"},
+        "version": 1,
+        **extra
+    }
+
+
+def test_compact_catalog_round_trip():
+    """Los productos materializados conservan todos los campos."""
+    document = _document("Galaxy S23", rating=None)
+    catalog = CompactCatalog.from_documents([document])
+    
+    product = catalog.get(str(document["_id"]))
+    
+    assert product.id == str(document["_id"])
+    assert product.name == "Galaxy S23"
+    assert product.rating is None
+    assert product.image_url is None
+    assert product.description == "Descripción de Galaxy S23"
+    assert product.specs == {"ram": "8GB", "storage": "128GB"}
+    assert catalog.brands.values == ["Samsung"]
+
+
+def test_compact_catalog_updates_and_removals():
+    """Actualizaciones, cambios de precio y bajas se reflejan en las lecturas."""
+    documents = [_document(f"P{i}", category="Laptops" if i % 2 else "Smartphones") for i in range(4)]
+    catalog = CompactCatalog.from_documents(documents)
+    first, second = str(documents[0]["_id"]), str(documents[1]["_id"])
+    
+    catalog.upsert({**documents[0], "name": "P0 v2", "version": 2})
+    catalog.update_price(second, 10.0)
+    catalog.remove(str(documents[2]["_id"]))
+    
+    assert len(catalog) == 3
+    assert catalog.get(first).name == "P0 v2"
+    assert catalog.get(second).price == 10.0
+    assert catalog.get(second).version == 2
+    assert catalog.get(str(documents[2]["_id"])) is None
+    assert catalog.get("no-es-un-id") is None
+    assert [product.name for product in catalog.products("laptops")] == ["P1", "P3"]
+    assert [product.name for product in catalog.products()] == ["P1", "P3", "P0 v2"]
+
+
+def test_compact_catalog_out_of_order_ids():
+    """Los IDs que llegan fuera de orden se siguen encontrando."""
+    later, earlier = _document("Nuevo"), _document("Viejo")
+    earlier["_id"] = ObjectId("000000000000000000000001")
+    catalog = CompactCatalog.from_documents([later, earlier])
+    
+    assert catalog.get(str(earlier["_id"])).name == "Viejo"
+    assert catalog.get(str(later["_id"])).name == "Nuevo"
+
+
+def test_compact_catalog_top_is_maintained_on_writes():
+    """Los rankings por categoría coinciden con un ordenamiento completo después de cada escritura."""
+    rng = random.Random(7)
+    documents = [
+        _document(f"P{i}", category=rng.choice(["Laptops", "laptops", "Tablets"]),
+                  price=rng.uniform(100, 2000), rating=rng.choice([None, 3.5, 4.0, 4.5, 4.8]))
+        for i in range(300)
+    ]
+    catalog = CompactCatalog.from_documents(documents)
+    
+    def rank(product, by):
+        return product.price if by == "price" else -product.rating
+    
+    for step in range(200):
+        for by in TOP_K_FIELDS:
+            candidates = [product for product in catalog.products("LAPTOPS") if by == "price" or product.rating is not None]
+            expected = sorted(rank(product, by) for product in candidates)[:TOP_K_LIMIT]
+            assert [rank(product, by) for product in catalog.top("Laptops", by, TOP_K_LIMIT)] == expected
+        
+        document = rng.choice(documents)
+        action = rng.random()
+        if action < 0.4:
+            catalog.update_price(str(document["_id"]), rng.uniform(50, 2000))
+        elif action < 0.7:
+            catalog.upsert({**document, "rating": rng.choice([None, 1.0, 5.0]), "category": rng.choice(["Laptops", "Tablets"])})
+        elif action < 0.85:
+            catalog.remove(str(document["_id"]))
+        else:
+            new_document = _document(f"N{step}", category="Laptops", price=rng.uniform(50, 2000), rating=4.9)
+            documents.append(new_document)
+            catalog.upsert(new_document)
+    
+    assert [product.name for product in catalog.top("tablets", "price", 3)] == [
+        product.name for product in sorted(catalog.products("Tablets"), key=lambda product: product.price)[:3]
+    ]
+
+
+@pytest.fixture
+def memory_mode():
+    """Modo de catálogo en memoria con un catálogo ya cargado y vencido."""
+    loaded = _document("Galaxy S23")
+    with patch.object(settings, "CATALOG_MEMORY_MODE", True), \
+         patch.object(settings, "CATALOG_SHARED_SNAPSHOT", False), \
+         patch.object(product_repository, "_memory_catalog", CompactCatalog.from_documents([loaded])), \
+         patch.object(product_repository, "_memory_catalog_loaded_at", 0.0):
+        yield loaded
+
+
+def test_memory_catalog_reloads_off_the_request_path(memory_mode):
+    """Un catálogo vencido se recarga en otro hilo; la petición responde con el anterior."""
+    release = threading.Event()
+    reloaded = _document("Pixel 8")
+    written = _document("iPhone 15")
+
+    def slow_load():
+        release.wait(5)
+        return [reloaded]
+
+    with patch.object(product_repository, "load_catalog_documents", side_effect=slow_load):
+        started = time.perf_counter()
+        products = product_repository.get_products()
+        assert time.perf_counter() - started < 1
+        assert [product.name for product in products] == ["Galaxy S23"]
+
+        # Una escritura durante la recarga no se pierde al cambiar de catálogo
+        product_repository._apply_to_memory_catalog("upsert", written)
+        release.set()
+        for _ in range(100):
+            if product_repository._memory_catalog_pending is None:
+                break
+            time.sleep(0.05)
+
+    assert sorted(product.name for product in product_repository.get_products()) == ["Pixel 8", "iPhone 15"]
+
+
+def test_price_update_replay_keeps_mongo_version(memory_mode):
+    """Un cambio de precio repetido sobre el catálogo recargado no vuelve a incrementar la versión."""
+    release = threading.Event()
+    product_id = str(memory_mode["_id"])
+    collection = MagicMock()
+    collection.find.return_value = [{"_id": memory_mode["_id"], "category": "Smartphones", "price": 999.99, "version": 1}]
+
+    def slow_load():
+        release.wait(5)
+        # La recarga ya lee el documento escrito en MongoDB
+        return [{**memory_mode, "price": 899.99, "version": 2}]
+
+    with patch.object(product_repository, "load_catalog_documents", side_effect=slow_load), \
+         patch.object(product_repository, "record_prices_changed"), \
+         patch("repository.product_repository.get_collection", return_value=collection):
+        product_repository.get_products()
+        product_repository.bulk_update_prices([{"id": product_id, "price": 899.99}])
+        assert product_repository._memory_catalog.get(product_id).version == 2
+        release.set()
+        for _ in range(100):
+            if product_repository._memory_catalog_pending is None:
+                break
+            time.sleep(0.05)
+
+    product = product_repository._memory_catalog.get(product_id)
+    assert (product.price, product.version) == (899.99, 2)
+
+
+def test_memory_catalog_miss_falls_back_to_mongo(memory_mode):
+    """Un producto creado por otro proceso se busca en MongoDB hasta la próxima recarga."""
+    created = _document("Pixel 8")
+    collection = MagicMock()
+    collection.find_one.return_value = dict(created)
+    collection.find.return_value = [dict(created)]
+
+    with patch.object(product_repository, "_memory_catalog_loaded_at", time.monotonic()), \
+         patch("repository.product_repository.get_collection", return_value=collection):
+        product = product_repository.get_product_by_id(str(created["_id"]))
+        products = product_repository.get_products_by_ids([str(memory_mode["_id"]), str(created["_id"])])
+
+    assert product.name == "Pixel 8"
+    assert [product.name for product in products] == ["Galaxy S23", "Pixel 8"]
+    collection.find.assert_called_once_with({"_id": {"$in": [created["_id"]]}})
@@ -0,0 +1,117 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from repository.category_stats_repository import (
+    _category_stats_pipeline,
+    _contribution,
+    _stats_key,
+    _to_category_stats,
+    get_category_stats,
+    record_prices_changed,
+    record_product_added
+)
+
+
+def test_contribution_escapes_brand_and_skips_missing_rating():
+    """La contribución de un producto usa rutas válidas y omite calificaciones nulas."""
+    inc = _contribution({"price": 10.0, "rating": None, "brand": "Dr. Tech", "category": "Audio"}, -1)
+    
+    assert inc == {"product_count": -1, "price_sum": -10.0, "brands.dr． tech": -1}
+
+
+def test_brands_are_grouped_without_case_on_every_path():
+    """Los caminos incremental y de agregación cuentan "Apple" y "apple" como la misma marca."""
+    collection = MagicMock()
+    record_product_added(collection, {"price": 10.0, "rating": 4.0, "brand": "Apple", "category": "Audio"})
+    
+    update = collection.database.__getitem__.return_value.update_one.call_args.args[1]
+    assert update["$inc"]["brands.apple"] == 1
+    assert update["$set"] == {"brand_names.apple": "Apple"}
+    
+    first_group = _category_stats_pipeline(["Audio"])[1]["$group"]
+    assert first_group["_id"]["brand"] == {"$toLower": {"$ifNull": ["$brand", ""]}}
+
+
+def test_non_ascii_category_keys_match_the_aggregation():
+    """Las claves solo pasan a minúsculas las letras ASCII, igual que $toLower en la agregación."""
+    collection = MagicMock()
+    record_product_added(collection, {"price": 10.0, "rating": 4.0, "brand": "Óptica Ñ", "category": "Óptica Visión"})
+    
+    stats = collection.database.__getitem__.return_value
+    assert stats.update_one.call_args.args[0] == {"_id": "Óptica visión"}
+    assert "brands.Óptica Ñ" in stats.update_one.call_args.args[1]["$inc"]
+    assert _stats_key("ÓPTICA") == "Óptica"
+
+
+def test_non_ascii_category_lookup_uses_collation():
+    """Una categoría no ASCII escrita con otras mayúsculas se encuentra con la collation."""
+    document = {
+        "_id": "Óptica", "category": "Óptica", "product_count": 1, "price_sum": 10.0,
+        "price_min": 10.0, "price_max": 10.0, "rating_sum": 0, "rating_count": 0, "brands": {"x": 1}
+    }
+    stats = MagicMock()
+    stats.find_one.side_effect = [None, document]
+    
+    with patch("repository.category_stats_repository.get_collection", return_value=stats):
+        result = get_category_stats("óptica")
+    
+    assert result.category == "Óptica"
+    assert stats.find_one.call_args_list[0].args[0] == {"_id": "óptica"}
+    assert "collation" in stats.find_one.call_args_list[1].kwargs
+
+
+def test_bulk_price_changes_use_increments():
+    """Los cambios masivos aplican deltas por categoría y solo recalculan los límites tocados."""
+    collection = MagicMock()
+    stats = collection.database.__getitem__.return_value
+    stats.find_one_and_update.side_effect = [
+        {"_id": "audio", "price_min": 5.0, "price_max": 50.0},
+        {"_id": "video", "price_min": 5.0, "price_max": 50.0}
+    ]
+    
+    with patch("repository.category_stats_repository._refresh_price_bounds") as refresh:
+        record_prices_changed(collection, [
+            ({"category": "Audio", "price": 10.0}, 12.0),
+            ({"category": "audio", "price": 20.0}, 15.0),
+            ({"category": "Video", "price": 50.0}, 40.0),
+            ({"category": "Video", "price": 30.0}, 30.0)
+        ])
+    
+    audio, video = stats.find_one_and_update.call_args_list
+    assert audio.args == ({"_id": "audio"}, {
+        "$inc": {"price_sum": -3.0}, "$min": {"price_min": 12.0}, "$max": {"price_max": 15.0}
+    })
+    assert video.args[1]["$inc"] == {"price_sum": -10.0}
+    refresh.assert_called_once_with(collection, "video", "Video")
+    stats.replace_one.assert_not_called()
+    collection.aggregate.assert_not_called()
+
+
+def test_to_category_stats():
+    """Convierte el documento materializado en el resumen de la categoría."""
+    stats = _to_category_stats({
+        "_id": "smartphones",
+        "category": "Smartphones",
+        "product_count": 3,
+        "price_sum": 3000.0,
+        "price_min": 899.99,
+        "price_max": 1199.99,
+        "rating_sum": 9.0,
+        "rating_count": 2,
+        "brands": {"apple": 2, "samsung": 1, "dr． tech": 0},
+        "brand_names": {"apple": "Apple", "dr． tech": "Dr. Tech"}
+    })
+    
+    assert stats.avg_price == 1000.0
+    assert stats.avg_rating == 4.5
+    assert [brand.brand for brand in stats.top_brands] == ["Apple", "samsung"]
+
+
+def test_get_category_stats_endpoint_not_found(client):
+    """Test básico para GET /api/products/category/{category}/stats - Categoría vacía."""
+    with patch('router.router.get_category_stats_logic') as mock_stats:
+        mock_stats.return_value = None
+        
+        response = client.get("/api/products/category/Smartphones/stats")
+        
+        assert response.status_code == 404
@@ -74,3 +74,77 @@ def test_health_check_openapi_endpoint(client):
     data = response.json()
     assert "openapi" in data
     assert "info" in data
+
+
+def test_update_product_endpoint_not_found(client):
+    """Test básico para PATCH /api/products/{id} - Producto inexistente."""
+    with patch('router.router.update_product_logic') as mock_update:
+        mock_update.return_value = None
+        
+        response = client.patch("/api/products/507f1f77bcf86cd799439011", json={"price": 10.5})
+        
+        assert response.status_code == 404
+        mock_update.assert_called_once_with("507f1f77bcf86cd799439011", {"price": 10.5})
+
+
+def test_update_product_endpoint_empty_body(client):
+    """Test básico para PATCH /api/products/{id} - Sin campos a actualizar."""
+    response = client.patch("/api/products/507f1f77bcf86cd799439011", json={})
+    
+    assert response.status_code == 400
+
+
+def test_delete_product_endpoint(client):
+    """Test básico para DELETE /api/products/{id} - Eliminar producto."""
+    with patch('router.router.delete_product_logic') as mock_delete:
+        mock_delete.return_value = True
+        
+        response = client.delete("/api/products/507f1f77bcf86cd799439011")
+        
+        assert response.status_code == 204
+
+
+def test_bulk_update_prices_endpoint(client):
+    """Test básico para POST /api/products/prices:bulk - Actualización masiva."""
+    with patch('business_logic.product_logic.bulk_update_prices') as mock_bulk:
+        mock_bulk.return_value = {"matched_count": 1, "modified_count": 1, "invalid_ids": ["bad-id"]}
+        
+        response = client.post("/api/products/prices:bulk", json={
+            "updates": [
+                {"id": "507f1f77bcf86cd799439011", "price": 10.0},
+                {"id": "bad-id", "price": 5.0}
+            ]
+        })
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["modified_count"] == 1
+        assert data["invalid_ids"] == ["bad-id"]
+
+
+def test_bulk_update_prices_endpoint_validation(client):
+    """Test básico para POST /api/products/prices:bulk - Validación de precios."""
+    response = client.post("/api/products/prices:bulk", json={
+        "updates": [{"id": "507f1f77bcf86cd799439011", "price": -1}]
+    })
+    
+    assert response.status_code == 422
+
+
+def test_top_products_endpoint(client):
+    """Test básico para GET /api/products/category/{category}/top - Ranking por categoría."""
+    with patch('business_logic.product_logic.get_top_products') as mock_top:
+        mock_top.return_value = []
+        
+        response = client.get("/api/products/category/Smartphones/top?by=price&k=3")
+        
+        assert response.status_code == 200
+        assert response.json() == []
+        mock_top.assert_called_once_with("Smartphones", "price", 3)
+
+
+def test_top_products_endpoint_validation(client):
+    """Test básico para GET /api/products/category/{category}/top - Criterio inválido."""
+    response = client.get("/api/products/category/Smartphones/top?by=name")
+    
+    assert response.status_code == 400
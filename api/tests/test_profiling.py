@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from middleware.profiling import install_profiling
+
+
+def _slow_handler():
+    deadline = time.perf_counter() + 0.03
+    while time.perf_counter() < deadline:
+        pass
+    return {"status": "ok"}
+
+
+@pytest.fixture
+def profiled_client(tmp_path):
+    """Aplicación mínima con el middleware de perfilado habilitado."""
+    app = FastAPI()
+    
+    @app.get("/slow")
+    async def slow():
+        return _slow_handler()
+    
+    install_profiling(app, token="secret", output_dir=str(tmp_path))
+    return TestClient(app), tmp_path
+
+
+def test_profiling_skipped_without_token(profiled_client):
+    """Sin token ni muestreo la petición no se perfila."""
+    client, output_dir = profiled_client
+    
+    response = client.get("/slow", headers={"X-Profile-Token": "wrong"})
+    
+    assert response.status_code == 200
+    assert "X-Profile-File" not in response.headers
+    assert os.listdir(output_dir) == []
+
+
+def test_profiling_writes_profile_file(profiled_client):
+    """Con token el perfil se escribe en el directorio configurado."""
+    client, output_dir = profiled_client
+    
+    response = client.get("/slow", headers={"X-Profile-Token": "secret"})
+    
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+    profile = (output_dir / response.headers["X-Profile-File"]).read_text()
+    assert "_slow_handler" in profile
+
+
+def test_profiling_inline_collapsed(profiled_client):
+    """Con token y formato collapsed el perfil se devuelve en la respuesta."""
+    client, _ = profiled_client
+    
+    response = client.get("/slow?profile_token=secret&profile_format=collapsed")
+    
+    assert response.status_code == 200
+    assert response.headers["X-Profiled-Status"] == "200"
+    line = next(l for l in response.text.splitlines() if "_slow_handler" in l)
+    assert int(line.rsplit(" ", 1)[1]) > 0
+
+
+def test_profiling_keeps_at_most_max_files(tmp_path):
+    """Los perfiles más antiguos se borran al superar max_files."""
+    app = FastAPI()
+    
+    @app.get("/slow")
+    async def slow():
+        return _slow_handler()
+    
+    install_profiling(app, sample_rate=1.0, output_dir=str(tmp_path), max_files=2)
+    client = TestClient(app)
+    
+    files = [client.get("/slow").headers["X-Profile-File"] for _ in range(3)]
+    
+    assert sorted(os.listdir(tmp_path)) == sorted(files[1:])
+
+
+def test_profiling_flags_concurrent_requests(tmp_path):
+    """Un perfil tomado con otras peticiones en curso indica cuántas se solaparon."""
+    app = FastAPI()
+    
+    @app.get("/wait")
+    async def wait():
+        await asyncio.sleep(0.05)
+        return {"status": "ok"}
+    
+    install_profiling(app, token="secret", output_dir=str(tmp_path))
+    
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            alone = await client.get("/wait", headers={"X-Profile-Token": "secret"})
+            profiled, _ = await asyncio.gather(
+                client.get("/wait", headers={"X-Profile-Token": "secret"}),
+                client.get("/wait")
+            )
+        return alone, profiled
+    
+    alone, profiled = asyncio.run(run())
+    
+    assert alone.headers["X-Profile-Concurrent-Requests"] == "0"
+    assert profiled.headers["X-Profile-Concurrent-Requests"] == "1"
@@ -0,0 +1,140 @@
+import threading
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from config.query_monitor import SlowQueryListener, redact_command, summarize_explain
+
+
+def _event(request_id, command_name, duration_ms, command=None):
+    return SimpleNamespace(
+        request_id=request_id,
+        command_name=command_name,
+        command=command,
+        database_name="meli_test",
+        duration_micros=int(duration_ms * 1000),
+        failure={"errmsg": "boom"}
+    )
+
+
+def test_redact_command_keeps_shape():
+    """Los valores de usuario se redactan y la forma del comando se conserva."""
+    command = {
+        "find": "products",
+        "filter": {"category": "Smartphones", "price": {"$gt": 100}},
+        "sort": {"price": 1},
+        "limit": 5,
+        "lsid": {"id": "x"}
+    }
+    
+    assert redact_command(command) == {
+        "find": "products",
+        "filter": {"category": "?", "price": {"$gt": "?"}},
+        "sort": {"price": 1},
+        "limit": 5
+    }
+
+
+def test_redact_command_keeps_every_pipeline_stage():
+    """Cada etapa del pipeline se conserva; solo se reducen las listas de valores."""
+    command = {
+        "aggregate": "products",
+        "pipeline": [
+            {"$match": {"brand": {"$in": ["Apple", "Samsung", "Google"]}, "$or": [{"price": 1}, {"rating": 5}]}},
+            {"$group": {"_id": "$category", "total": {"$sum": 1}}},
+            {"$sort": {"total": -1}}
+        ],
+        "cursor": {}
+    }
+    
+    redacted = redact_command(command)
+    
+    assert redacted["aggregate"] == "products"
+    assert [list(stage) for stage in redacted["pipeline"]] == [["$match"], ["$group"], ["$sort"]]
+    assert redacted["pipeline"][0]["$match"] == {"brand": {"$in": ["?"]}, "$or": [{"price": "?"}, {"rating": "?"}]}
+
+
+def test_summarize_explain_detects_collscan():
+    """El resumen indica COLLSCAN y documentos examinados del plan ganador."""
+    explain = {
+        "queryPlanner": {
+            "winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}},
+            "rejectedPlans": [{"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "price_1"}}]
+        },
+        "executionStats": {"nReturned": 3, "totalDocsExamined": 1000, "totalKeysExamined": 0}
+    }
+    
+    summary = summarize_explain(explain)
+    
+    assert summary["stages"] == ["SORT", "COLLSCAN"]
+    assert summary["collscan"] is True
+    assert summary["indexes"] == []
+    assert summary["docs_examined"] == 1000
+
+
+def test_slow_query_listener_records_only_slow_commands():
+    """Solo los comandos sobre el umbral se guardan en el buffer circular."""
+    listener = SlowQueryListener(threshold_ms=50, buffer_size=2)
+    command = {"find": "products", "filter": {"brand": "Apple"}}
+    
+    for request_id, duration in ((1, 10), (2, 80), (3, 90), (4, 120)):
+        listener.started(_event(request_id, "find", 0, command))
+        listener.succeeded(_event(request_id, "find", duration))
+    
+    recent = listener.recent_queries()
+    assert [entry["duration_ms"] for entry in recent] == [120, 90]
+    assert recent[0]["command"] == {"find": "products", "filter": {"brand": "?"}}
+
+
+def test_slow_query_listener_captures_explain():
+    """El explain se ejecuta en segundo plano y su resumen queda en la entrada."""
+    explain_runner = lambda database, command: {"queryPlanner": {"winningPlan": {"stage": "IXSCAN", "indexName": "_id_"}}}
+    listener = SlowQueryListener(threshold_ms=0, explain_runner=explain_runner)
+    
+    listener.started(_event(1, "find", 0, {"find": "products", "filter": {}}))
+    listener.succeeded(_event(1, "find", 5))
+    listener._executor.shutdown(wait=True)
+    
+    assert listener.recent_queries()[0]["explain"]["indexes"] == ["_id_"]
+
+
+def test_slow_queries_endpoint_requires_token(client):
+    """Test básico para GET /admin/slow-queries - Requiere token de administración."""
+    with patch('router.admin_router.settings') as mock_settings:
+        mock_settings.ADMIN_TOKEN = "secret"
+        
+        assert client.get("/admin/slow-queries").status_code == 401
+        
+        response = client.get("/admin/slow-queries", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert "queries" in response.json()
+
+
+def test_slow_query_listener_throttles_explains():
+    """Cada forma de comando se explica una vez por intervalo y la cola de explain está acotada."""
+    release = threading.Event()
+    calls = []
+    
+    def explain_runner(database, command):
+        calls.append(command)
+        release.wait(5)
+        return {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+    
+    listener = SlowQueryListener(threshold_ms=0, explain_runner=explain_runner, max_pending_explains=2)
+    commands = [
+        {"find": "products", "filter": {"brand": "Apple"}},
+        {"find": "products", "filter": {"brand": "Samsung"}},
+        {"find": "products", "filter": {"price": 10}},
+        {"find": "products", "filter": {"rating": 5}}
+    ]
+    for request_id, command in enumerate(commands):
+        listener.started(_event(request_id, "find", 0, command))
+        listener.succeeded(_event(request_id, "find", 5))
+    release.set()
+    listener._executor.shutdown(wait=True)
+    
+    explains = [entry["explain"] for entry in reversed(listener.recent_queries())]
+    assert len(calls) == 2
+    assert explains[1] == {"skipped": "forma ya explicada recientemente"}
+    assert explains[3] == {"skipped": "cola de explain llena"}
+    assert listener._pending_explains == 0
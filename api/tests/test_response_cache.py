@@ -0,0 +1,250 @@
+import time
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from middleware.profiling import install_profiling
+from middleware.response_cache import ResponseCache, cache_family, entity_tag, install_response_cache
+from models.product import ProductDetail
+
+
+@pytest.fixture
+def cached_client():
+    """Aplicación mínima con el middleware de caché y un contador de llamadas."""
+    app = FastAPI()
+    cache = ResponseCache(max_bytes=1024 * 1024, ttl_seconds=30)
+    calls = {"count": 0}
+
+    @app.get("/api/products/")
+    async def list_products(page: int = 1, size: int = 10):
+        calls["count"] += 1
+        return {"page": page, "size": size, "calls": calls["count"]}
+
+    @app.get("/api/products/{product_id}")
+    async def get_product(product_id: str):
+        calls["count"] += 1
+        if product_id == "missing":
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        return {"id": product_id, "calls": calls["count"]}
+
+    install_response_cache(app, cache)
+    return TestClient(app), cache, calls
+
+
+def test_cache_family():
+    """Las rutas se asignan a la familia que las invalida."""
+    assert cache_family("/api/products/") == "list"
+    assert cache_family("/api/products/category/Smartphones") == "category:smartphones"
+    assert cache_family("/api/products/category/Smartphones/stats") == "category:smartphones"
+    assert cache_family("/api/products/507f1f77bcf86cd799439011") == "product:507f1f77bcf86cd799439011"
+    assert cache_family("/api/products/507f1f77bcf86cd799439011/similar") == "similar"
+    assert cache_family("/health") is None
+
+
+def test_second_request_is_served_from_cache(cached_client):
+    """La segunda petición idéntica no ejecuta el endpoint."""
+    client, cache, calls = cached_client
+
+    first = client.get("/api/products/?size=5&page=2")
+    second = client.get("/api/products/?page=2&size=5")
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert calls["count"] == 1
+    assert second.headers["Cache-Control"] == "no-cache"
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert "Age" in second.headers
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_revalidation_with_etag(cached_client):
+    """Un If-None-Match con el ETag vigente recibe 304 sin cuerpo."""
+    client, cache, calls = cached_client
+    etag = client.get("/api/products/abc").headers["ETag"]
+
+    response = client.get("/api/products/abc", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["X-Cache"] == "HIT"
+    assert calls["count"] == 1
+
+
+def test_large_bodies_are_not_parsed_for_etag():
+    """Las respuestas que no caben en la caché no llevan ETag ni se parsean."""
+    app = FastAPI()
+    cache = ResponseCache(max_bytes=100, ttl_seconds=30)
+
+    @app.get("/api/products/")
+    async def list_products():
+        return [{"id": str(index), "version": 1} for index in range(50)]
+
+    install_response_cache(app, cache)
+    with patch("middleware.response_cache.entity_tag") as mock_tag:
+        response = TestClient(app).get("/api/products/")
+
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    mock_tag.assert_not_called()
+    assert cache.stats()["entries"] == 0
+
+
+def test_entity_tag_follows_product_versions():
+    """El ETag de un producto cambia con su versión y no con otros campos serializados igual."""
+    first = entity_tag(b'{"id": "abc", "version": 1, "price": 10.0}')
+
+    assert entity_tag(b'{"id": "abc", "version": 1, "price": 10.0}') == first
+    assert entity_tag(b'{"id": "abc", "version": 2, "price": 12.0}') != first
+    assert entity_tag(b'[{"id": "abc", "version": 1}]') != entity_tag(b'[{"id": "abc", "version": 2}]')
+    assert entity_tag(b'{"total_products": 3}') != entity_tag(b'{"total_products": 4}')
+
+
+def test_profiled_requests_bypass_cache():
+    """Los perfiles pedidos con token no se guardan ni se sirven a otros clientes."""
+    app = FastAPI()
+    cache = ResponseCache(max_bytes=1024 * 1024, ttl_seconds=30)
+
+    @app.get("/api/products/")
+    async def list_products():
+        return [{"id": "abc", "version": 1}]
+
+    # Orden más desfavorable: la caché por fuera del perfilador
+    install_profiling(app, token="secreto", output_dir="/tmp")
+    install_response_cache(app, cache)
+    client = TestClient(app)
+
+    profiled = client.get("/api/products/", headers={"X-Profile-Token": "secreto", "X-Profile-Format": "collapsed"})
+    anonymous = client.get("/api/products/")
+
+    assert profiled.headers["content-type"].startswith("text/plain")
+    assert "X-Cache" not in profiled.headers
+    assert anonymous.headers["X-Cache"] == "MISS"
+    assert anonymous.json() == [{"id": "abc", "version": 1}]
+
+    client.get("/api/products/")
+    profiled = client.get("/api/products/", headers={"X-Profile-Token": "secreto", "X-Profile-Format": "collapsed"})
+    assert profiled.headers["content-type"].startswith("text/plain")
+
+
+def test_error_responses_are_not_cached(cached_client):
+    """Las respuestas distintas de 200 no se guardan."""
+    client, cache, calls = cached_client
+
+    client.get("/api/products/missing")
+    response = client.get("/api/products/missing")
+
+    assert response.status_code == 404
+    assert "X-Cache" not in response.headers
+    assert calls["count"] == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidation_by_family(cached_client):
+    """Invalidar una familia solo descarta sus respuestas."""
+    client, cache, calls = cached_client
+    client.get("/api/products/")
+    client.get("/api/products/abc")
+
+    cache.invalidate("product:abc")
+
+    assert client.get("/api/products/").headers["X-Cache"] == "HIT"
+    assert client.get("/api/products/abc").headers["X-Cache"] == "MISS"
+
+
+def test_wildcard_invalidation():
+    """"category:*" descarta todas las categorías y las respuestas calculadas en vuelo."""
+    cache = ResponseCache(max_bytes=1024, ttl_seconds=30)
+    cache.put("/a", "category:a", cache.begin(), b"a", 200, {}, None)
+    in_flight = cache.begin()
+
+    cache.invalidate("category:*")
+    after = cache.begin()
+
+    assert cache.get("/a") is None
+    assert not cache.put("/b", "category:b", in_flight, b"b", 200, {}, None)
+    assert cache.put("/b", "category:b", after, b"b", 200, {}, None)
+
+
+def test_invalidation_marks_do_not_accumulate():
+    """Las marcas de invalidación se descartan cuando ninguna respuesta en cálculo las necesita."""
+    cache = ResponseCache(max_bytes=1024, ttl_seconds=30)
+    in_flight = cache.begin()
+
+    for index in range(5000):
+        cache.invalidate(f"product:{index}")
+    assert len(cache._invalidated) == 5000
+    assert not cache.put("/api/products/7", "product:7", in_flight, b"x", 200, {}, None)
+
+    cache.release(in_flight)
+    assert cache._invalidated == {}
+    assert cache._inflight == {}
+
+
+def test_memory_bound_and_ttl():
+    """La caché desaloja las entradas menos usadas al superar el límite y expira por TTL."""
+    cache = ResponseCache(max_bytes=10, ttl_seconds=0.05)
+    cache.put("/a", "list", cache.begin(), b"12345", 200, {}, None)
+    cache.put("/b", "list", cache.begin(), b"12345", 200, {}, None)
+    cache.get("/a")
+    cache.put("/c", "list", cache.begin(), b"12345", 200, {}, None)
+
+    assert cache.get("/b") is None
+    assert cache.get("/a") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.size_bytes <= 10
+
+    time.sleep(0.06)
+    assert cache.get("/c") is None
+
+
+def test_create_product_invalidates_list(client):
+    """Crear un producto invalida el listado cacheado."""
+    product = ProductDetail(
+        id="507f1f77bcf86cd799439011",
+        name="Galaxy S23",
+        brand="Samsung",
+        price=999.99,
+        category="Smartphones",
+        specs={}
+    )
+    with patch('router.router.list_products') as mock_list, \
+         patch('business_logic.product_logic.create_product') as mock_create:
+        mock_list.return_value = []
+        mock_create.return_value = product
+
+        assert client.get("/api/products/").headers["X-Cache"] == "MISS"
+        assert client.get("/api/products/").headers["X-Cache"] == "HIT"
+
+        response = client.post("/api/products/", json={
+            "name": "Galaxy S23",
+            "brand": "Samsung",
+            "price": 999.99,
+            "category": "Smartphones"
+        })
+        assert response.status_code == 201
+
+        mock_list.return_value = [product]
+        response = client.get("/api/products/")
+        assert response.headers["X-Cache"] == "MISS"
+        assert len(response.json()) == 1
+
+
+def test_cors_headers_follow_each_request_origin(client):
+    """Las respuestas cacheadas llevan las cabeceras CORS del Origin de cada petición."""
+    with patch('router.router.list_products') as mock_list:
+        mock_list.return_value = []
+
+        assert client.get("/api/products/").headers["X-Cache"] == "MISS"
+        anonymous = client.get("/api/products/", headers={"Origin": "https://a.example"})
+        first = client.get("/api/products/", headers={"Origin": "https://a.example", "Cookie": "session=1"})
+        second = client.get("/api/products/", headers={"Origin": "https://b.example", "Cookie": "session=1"})
+
+    assert anonymous.headers["X-Cache"] == "HIT"
+    assert anonymous.headers["Access-Control-Allow-Origin"] == "*"
+    assert first.headers["X-Cache"] == "HIT"
+    assert first.headers["Access-Control-Allow-Origin"] == "https://a.example"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["Access-Control-Allow-Origin"] == "https://b.example"
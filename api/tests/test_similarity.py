@@ -0,0 +1,159 @@
+import threading
+import time
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from business_logic import product_logic
+from business_logic.similarity import ProductFeatureIndex, encode_feature_matrix, encode_features, parse_spec_number
+from models.product import ProductDetail
+
+
+def _product(product_id, category, brand, price, rating=4.5, specs=None):
+    return {
+        "id": product_id,
+        "category": category,
+        "brand": brand,
+        "price": price,
+        "rating": rating,
+        "specs": specs or {}
+    }
+
+
+def test_parse_spec_number():
+    """Extrae valores numéricos de especificaciones en texto."""
+    assert parse_spec_number("128GB") == 128.0
+    assert parse_spec_number("6,1 pulgadas") == 6.1
+    assert parse_spec_number("Apple M2") == 2.0
+    assert parse_spec_number("OLED") is None
+
+
+def test_feature_index_nearest_same_category():
+    """Los vecinos se buscan solo dentro de la categoría y ordenados por distancia."""
+    index = ProductFeatureIndex()
+    index.rebuild([
+        _product("a", "Smartphones", "Samsung", 999.99, specs={"storage": "128GB"}),
+        _product("b", "Smartphones", "Samsung", 949.99, specs={"storage": "128GB"}),
+        _product("c", "Smartphones", "Apple", 199.99, specs={"storage": "64GB"}),
+        _product("d", "Laptops", "Samsung", 999.99, specs={"storage": "128GB"}),
+    ])
+    
+    neighbours = [product_id for product_id, _ in index.nearest("a", 5)]
+    
+    assert neighbours == ["b", "c"]
+
+
+def test_feature_index_incremental_updates():
+    """El índice refleja altas, cambios de categoría, precios y bajas."""
+    index = ProductFeatureIndex()
+    index.rebuild([_product("a", "Laptops", "Apple", 1499.99)])
+    
+    index.upsert(_product("b", "Laptops", "Apple", 1399.99))
+    index.upsert(_product("c", "Laptops", "Apple", 300.0))
+    assert [product_id for product_id, _ in index.nearest("a", 1)] == ["b"]
+    
+    index.update_price("c", 1500.0)
+    assert [product_id for product_id, _ in index.nearest("a", 1)] == ["c"]
+    
+    index.upsert(_product("c", "Tablets", "Apple", 1500.0))
+    index.remove("b")
+    assert index.nearest("a", 3) == []
+    assert len(index) == 2
+
+
+def test_encode_feature_matrix_matches_single_encoding():
+    """La codificación vectorizada produce los mismos vectores que la individual."""
+    products = [
+        _product("a", "Smartphones", "Samsung", 999.99, specs={"storage": "128GB", "ram": "8GB", "color": "negro"}),
+        _product("b", "Laptops", None, 0, rating=None, specs={"screen": "6,1 pulgadas", "temp": "-5"}),
+        _product("c", "Smartphones", "Apple", 199.99, specs={})
+    ]
+    
+    ids, categories, matrix = encode_feature_matrix(products)
+    
+    assert ids == ["a", "b", "c"]
+    assert categories == ["smartphones", "laptops", "smartphones"]
+    np.testing.assert_array_equal(matrix, np.stack([encode_features(product) for product in products]))
+
+
+def test_feature_index_refreshes_in_background():
+    """La reconstrucción no bloquea a quien consulta y conserva las escrituras hechas mientras corre."""
+    index = ProductFeatureIndex(refresh_seconds=0)
+    index.rebuild([_product("a", "Laptops", "Apple", 1499.99), _product("b", "Laptops", "Apple", 1399.99)])
+    release = threading.Event()
+    
+    def slow_loader():
+        release.wait(5)
+        return [_product("a", "Laptops", "Apple", 1499.99), _product("c", "Laptops", "Apple", 1450.0)]
+    
+    started = time.perf_counter()
+    index.ensure_loaded(slow_loader)
+    assert time.perf_counter() - started < 1
+    assert [product_id for product_id, _ in index.nearest("a", 5)] == ["b"]
+    
+    index.upsert(_product("d", "Laptops", "Apple", 1500.0))
+    release.set()
+    for _ in range(100):
+        if index._pending is None:
+            break
+        time.sleep(0.05)
+    
+    assert [product_id for product_id, _ in index.nearest("a", 5)] == ["d", "c"]
+
+
+def test_writes_during_first_build_are_indexed():
+    """Un producto creado mientras se construye el índice por primera vez queda indexado."""
+    index = ProductFeatureIndex()
+    release = threading.Event()
+    created = ProductDetail(id="c", name="MacBook Pro", brand="Apple", price=1999.99, category="Laptops", specs={})
+    
+    def slow_loader():
+        release.wait(5)
+        return [_product("a", "Laptops", "Apple", 1499.99)]
+    
+    index.ensure_loaded(slow_loader)
+    with patch.object(product_logic, "feature_index", index), \
+         patch.object(product_logic, "create_product", return_value=created):
+        product_logic.create_product_logic(created.dict())
+    release.set()
+    for _ in range(100):
+        if index.loaded:
+            break
+        time.sleep(0.05)
+    
+    assert [product_id for product_id, _ in index.nearest("a", 5)] == ["c"]
+
+
+def test_similar_products_before_index_is_loaded():
+    """Mientras se construye el índice completo se responde con la categoría del producto."""
+    reference = ProductDetail(id="a", name="MacBook Air", brand="Apple", price=1499.99, category="Laptops", specs={})
+    neighbour = ProductDetail(id="b", name="MacBook Pro", brand="Apple", price=1999.99, category="Laptops", specs={})
+    
+    with patch.object(product_logic, "feature_index", ProductFeatureIndex()) as index, \
+         patch.object(index, "ensure_loaded"), \
+         patch.object(product_logic, "get_product_by_id", return_value=reference), \
+         patch.object(product_logic, "get_product_feature_sources", return_value=[neighbour.dict()]) as sources, \
+         patch.object(product_logic, "get_products_by_ids", side_effect=lambda ids: [neighbour] if ids == ["b"] else []):
+        similar = product_logic.get_similar_products("a", 3)
+    
+    assert similar == [neighbour]
+    sources.assert_called_once_with("Laptops")
+    assert not index.loaded
+
+
+def test_get_similar_products_endpoint_not_found(client):
+    """Test básico para GET /api/products/{id}/similar - Producto inexistente."""
+    with patch('router.router.get_similar_products') as mock_similar:
+        mock_similar.return_value = None
+        
+        response = client.get("/api/products/507f1f77bcf86cd799439011/similar?k=3")
+        
+        assert response.status_code == 404
+        mock_similar.assert_called_once_with("507f1f77bcf86cd799439011", 3)
+
+
+def test_get_similar_products_endpoint_validation(client):
+    """Test básico para GET /api/products/{id}/similar - k fuera de rango."""
+    response = client.get("/api/products/507f1f77bcf86cd799439011/similar?k=0")
+    
+    assert response.status_code == 422